@@ -1,13 +1,30 @@
 import yaml
 import pymysql
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+DATABASE = 'scoring'
+
+# Defaults for the connection pool, which can be overridden in etc/db.yaml
+POOL_SIZE = 10        # Idle connections kept open
+POOL_OVERFLOW = 40    # Extra connections allowed under load
+POOL_TIMEOUT = 30     # Seconds to wait for a free connection
+POOL_PING_AFTER = 30  # Seconds idle before a connection is health checked
+
+_creds = None
 
 def load_creds():
     """
-    Load database credentials from a file.
+    Load database credentials from a file. The file is only read once.
     """
-    with open('etc/db.yaml', 'r') as f:
-        creds = yaml.load(f)
-    return creds
+    global _creds
+    if _creds is None:
+        with open('etc/db.yaml', 'r') as f:
+            _creds = yaml.load(f)
+    return _creds
 
 def connect():
     """
@@ -18,10 +35,141 @@ def connect():
     """
     creds = load_creds()
     connection = pymysql.connect(host=creds['host'], 
-            user=creds['user'], password=creds['password'])
+            user=creds['user'], password=creds['password'],
+            database=DATABASE, autocommit=True)
     return connection
 
-def get(table, columns, where=None, orderby=None, args=None):
+class ConnectionPool(object):
+    """
+    A thread-safe pool of database connections.
+
+    Up to `size` idle connections are kept open for reuse, and up to
+    `overflow` more are opened when the pool is busy. They are closed again
+    when released. Once the limit is reached callers wait for a connection
+    to be released. Connections which sat idle are pinged before reuse, and
+    the pool is discarded in a child process after a fork.
+
+    Attributes:
+        size (int): Maximum number of idle connections kept open
+        overflow (int): Number of connections allowed beyond size
+        timeout (int): Seconds to wait for a free connection
+    """
+    def __init__(self, size=POOL_SIZE, overflow=POOL_OVERFLOW,
+                 timeout=POOL_TIMEOUT):
+        self.size = size
+        self.overflow = overflow
+        self.timeout = timeout
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all pooled connections, such as after a fork.
+        """
+        self.pid = os.getpid()
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(self.size + self.overflow)
+
+    def acquire(self):
+        """
+        Take a healthy connection from the pool, opening one if needed.
+
+        Returns:
+            Connection: A connection to the database
+        """
+        if self.pid != os.getpid():
+            self.reset()
+        if not self.slots.acquire(timeout=self.timeout):
+            raise TimeoutError('Timed out waiting for a database connection')
+        try:
+            while True:
+                try:
+                    connection, last_used = self.idle.get_nowait()
+                except queue.Empty:
+                    return connect()
+                if time.monotonic() - last_used < POOL_PING_AFTER:
+                    return connection
+                try:
+                    connection.ping(reconnect=False)
+                    return connection
+                except Exception:
+                    close_quietly(connection)
+        except:
+            self.slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        """
+        Return a connection to the pool.
+
+        Arguments:
+            connection (Connection): The connection to return
+            discard (bool): Close the connection rather than reusing it
+        """
+        if self.pid != os.getpid():
+            return
+        try:
+            if discard or self.idle.qsize() >= self.size:
+                close_quietly(connection)
+            else:
+                self.idle.put((connection, time.monotonic()))
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with block.
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        except pymysql.err.OperationalError:
+            self.release(connection, discard=True)
+            raise
+        except:
+            try:
+                connection.rollback()
+            except Exception:
+                self.release(connection, discard=True)
+                raise
+            self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+def close_quietly(connection):
+    """
+    Close a connection, ignoring any errors.
+
+    Arguments:
+        connection (Connection): The connection to close
+    """
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Get the shared connection pool, creating it on first use.
+
+    Returns:
+        ConnectionPool: The connection pool
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                creds = load_creds()
+                _pool = ConnectionPool(creds.get('pool_size', POOL_SIZE),
+                                       creds.get('pool_overflow', POOL_OVERFLOW),
+                                       creds.get('pool_timeout', POOL_TIMEOUT))
+    return _pool
+
+def get(table, columns, where=None, orderby=None, args=None, limit=None):
     """
     Execute a SELECT statement on the database and return the matching data.
 
@@ -31,6 +179,7 @@ def get(table, columns, where=None, orderby=None, args=None):
         where (str): Optional, MySQL WHERE statement
         orderby (str): Optional, MySQL ORDER BY statement
         args (Tuple(str)): Optional, arguments for a prepared statement
+        limit (int): Optional, maximum number of rows to return
 
     Returns:
         List(List(object)): List of rows which match the SELECT statement
@@ -42,14 +191,14 @@ def get(table, columns, where=None, orderby=None, args=None):
         cmd += ' WHERE ' + where
     if orderby is not None:
         cmd += ' ORDER BY ' + orderby
+    if limit is not None:
+        cmd += ' LIMIT %d' % int(limit)
 
     # Execute command
-    connection = connect()
-    with connection.cursor() as cursor:
-        cursor.execute('USE scoring')
-        cursor.execute(cmd, args)
-        rows = cursor.fetchall()
-    connection.close()
+    with get_pool().connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(cmd, args)
+            rows = cursor.fetchall()
     return rows
 
 def getall(table, orderby=None):
@@ -76,15 +225,45 @@ def execute(cmd, args=None):
     Returns:
         int: The ID of the last row created or modified by the command
     """
-    connection = connect()
-    with connection.cursor() as cursor:
-        cursor.execute('USE scoring')
-        cursor.execute(cmd, args)
-        lid = cursor.lastrowid
-    connection.commit()
-    connection.close()
+    with get_pool().connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(cmd, args)
+            lid = cursor.lastrowid
     return lid
 
+def executemany(cmd, args_list):
+    """
+    Execute a MySQL command on the database once for each set of arguments.
+    INSERT commands are sent as a single multi-row statement.
+
+    Arguments:
+        cmd (str): MySQL command to execute
+        args_list (List(Tuple(str))): Arguments for each execution
+
+    Returns:
+        int: The number of rows affected
+    """
+    with get_pool().connection() as connection:
+        with connection.cursor() as cursor:
+            count = cursor.executemany(cmd, args_list)
+    return count
+
+def execute_batches(commands):
+    """
+    Execute several MySQL commands, each once for each of its sets of
+    arguments, in a single transaction.
+
+    Arguments:
+        commands (List(Tuple(str, List(Tuple(str))))): Each command and the
+            arguments for each of its executions
+    """
+    with get_pool().connection() as connection:
+        connection.begin()
+        with connection.cursor() as cursor:
+            for cmd, args_list in commands:
+                cursor.executemany(cmd, args_list)
+        connection.commit()
+
 def reset_table(table):
     """
     Delete all rows from the given table.
@@ -111,10 +290,16 @@ def reset_all_tables():
     reset_table('check_io')
     reset_table('credential')
     reset_table('result')
+    reset_table('result_archive')
+    reset_table('latest_result')
+    reset_table('sla_state')
+    reset_table('sla_violation')
+    reset_table('round_bitmap')
     reset_table('pcr')
     reset_table('default_creds_log')
     reset_table('revert_log')
     reset_table('check_log')
+    reset_table('engine_shard')
 
 def insert(table, columns, args):
     """
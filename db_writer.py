@@ -185,10 +185,15 @@ def write_checks(vapps):
         
                     poller = get_poller(check_type)
                     checker = get_checker(check_type, checker)
+
+                    # Optional overrides of the artifact retention policy
+                    artifacts = check_data.get('artifacts')
+                    if artifacts is not None:
+                        artifacts = json.dumps(artifacts)
             
                     db_id = db.insert('service_check',
-                        ['name', 'port', 'check_function', 'poller', 'system'],
-                        (name, port, checker, poller, system))
+                        ['name', 'port', 'check_function', 'poller', 'system', 'artifacts'],
+                        (name, port, checker, poller, system, artifacts))
                     check_ids[name] = db_id
     return check_ids
 
@@ -0,0 +1,471 @@
+"""
+This module contains the store which holds the files retrieved by file
+pollers until their checks are done.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+import io
+import os
+import random
+import shutil
+import time
+import uuid
+
+CHECK_FILES_DIR = 'checkfiles'
+OBJECTS_DIR = 'checkfiles/objects'
+
+# Format of the time in the names of references to persisted files
+REF_TIME_FORMAT = '%Y-%m-%d-%H:%M:%S'
+
+# Suffix of objects being saved, and seconds after which one left behind
+# by a stopped engine is collected
+TEMP_SUFFIX = '.tmp'
+STALE_TEMP_AGE = 3600
+
+# Which checked files are persisted to the check files directory
+PERSIST_ALL = 'all'
+PERSIST_FAILURES = 'failures'
+PERSIST_NONE = 'none'
+
+class Artifact(object):
+    """
+    A file retrieved by a poller.
+
+    The contents are kept in memory, unless the file grows past the store's
+    memory threshold or is evicted to make room for newer files, in which
+    case they are spooled to a file in the store's spool directory.
+
+    Attributes:
+        store (ArtifactStore): The store holding this artifact
+        name (str): Name of the artifact, the path of its spool file once
+            spooled
+        extension (str): The file extension
+        size (int): The number of bytes written
+        created (float): When the artifact was created
+        buffer (BytesIO): The contents, while held in memory
+        path (str): The spool file holding the contents, once spooled
+    """
+    def __init__(self, store, extension):
+        self.store = store
+        self.name = '{}.{}'.format(uuid.uuid4().hex, extension)
+        self.extension = extension
+        self.size = 0
+        self.created = time.monotonic()
+        self.buffer = io.BytesIO()
+        self.path = None
+        self.file = None
+        self.lock = Lock()
+
+    def write(self, data):
+        """
+        Write bytes to the artifact.
+
+        Arguments:
+            data (bytes): The bytes to write
+        """
+        victims = []
+        with self.lock:
+            if self.buffer is not None:
+                fits, victims = self.store.reserve(self, len(data))
+                if not fits:
+                    self.spool_locked()
+            if self.buffer is not None:
+                self.buffer.write(data)
+            else:
+                self.file.write(data)
+            self.size += len(data)
+        for victim in victims:
+            victim.spool()
+
+    def spool(self):
+        """
+        Move the contents of the artifact from memory to a spool file.
+        """
+        with self.lock:
+            self.spool_locked()
+
+    def spool_locked(self):
+        if self.buffer is None:
+            return
+        self.path = os.path.join(self.store.spool_dir, self.name)
+        self.file = open(self.path, 'wb')
+        self.file.write(self.buffer.getvalue())
+        self.buffer = None
+        self.name = self.path
+        self.store.release(self)
+
+    def open_path(self):
+        """
+        Spool the artifact and close its spool file, so that another program
+        can write the file itself.
+
+        Returns:
+            str: The path of the spool file
+        """
+        with self.lock:
+            self.spool_locked()
+            self.file.close()
+        return self.path
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    def read(self):
+        """
+        Read the contents of the artifact.
+
+        Returns:
+            bytes: The contents
+        """
+        with self.lock:
+            if self.buffer is not None:
+                return self.buffer.getvalue()
+            if not self.file.closed:
+                self.file.flush()
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def save(self, path):
+        """
+        Save a copy of the contents of the artifact to a new file. A spooled
+        artifact keeps its spool file until it is discarded.
+
+        Arguments:
+            path (str): The path to save the artifact to
+        """
+        with self.lock:
+            if self.buffer is not None:
+                with open(path, 'wb') as f:
+                    f.write(self.buffer.getvalue())
+            else:
+                self.file.flush()
+                shutil.copyfile(self.path, path)
+
+    def discard(self):
+        """
+        Drop the artifact from the store, deleting its spool file if any.
+        """
+        with self.lock:
+            self.buffer = None
+            if self.file is not None:
+                self.file.close()
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
+            self.path = None
+        self.store.remove(self)
+
+
+class ArtifactStore(object):
+    """
+    Holds the files retrieved by file pollers until their checks are done,
+    then persists only those worth keeping.
+
+    Files up to `memory_threshold` bytes are held in memory, up to
+    `memory_limit` bytes in total, evicting the least recently written files
+    to the spool directory when the limit is reached. Larger files are
+    spooled as soon as they pass the threshold. The spool directory should
+    be on a tmpfs, so that neither ever touches the disk.
+
+    Once a file has been checked, it is persisted according to its check's
+    retention policy and otherwise dropped. Persisted files are content
+    addressed. Each distinct file is saved once, as an object named by its
+    SHA1 in the objects directory, and each persisted result gets a
+    reference to it, which is a hard link named by its time and digest in
+    the directory of its check. Files identical to one already stored are
+    thus never written again, and the link count of an object is its
+    reference count. An object is deleted along with its last reference.
+
+    The retention policy has three parts:
+        persist (str): 'all', 'failures' or 'none'
+        sample (float): Fraction of the files of successful checks to
+            persist as well, when persisting failures
+        max_age (float): Hours persisted files are kept, or 0 to keep them
+    Checks may override any part of the store's default policy.
+
+    Attributes:
+        memory_limit (int): Maximum total size of files held in memory
+        memory_threshold (int): Maximum size of a file held in memory
+        spool_dir (str): The directory files are spooled to
+        policy (Dict(str->object)): The default retention policy
+        memory_used (int): Total size of files held in memory
+        in_memory (OrderedDict(Artifact->int)): Files held in memory and
+            their sizes, least recently written first
+        spooled (Dict(Artifact->float)): Files spooled and not yet dropped
+    """
+    def __init__(self, memory_limit, memory_threshold, spool_dir,
+                 persist=PERSIST_FAILURES, sample=0.0, max_age=0):
+        self.lock = Lock()
+        self.memory_used = 0
+        self.in_memory = OrderedDict()
+        self.spooled = {}
+        self.configure(memory_limit, memory_threshold, spool_dir, persist,
+                       sample, max_age)
+
+    def configure(self, memory_limit, memory_threshold, spool_dir,
+                  persist=PERSIST_FAILURES, sample=0.0, max_age=0):
+        """
+        Update the store's limits and default retention policy.
+
+        Arguments:
+            memory_limit (int): Maximum total size of files held in memory
+            memory_threshold (int): Maximum size of a file held in memory
+            spool_dir (str): The directory files are spooled to
+            persist (str): Which checked files are persisted by default
+            sample (float): Fraction of successful files persisted by default
+            max_age (float): Hours persisted files are kept by default
+        """
+        os.makedirs(spool_dir, exist_ok=True)
+        self.memory_limit = memory_limit
+        self.memory_threshold = memory_threshold
+        self.spool_dir = spool_dir
+        self.policy = {'persist': persist, 'sample': sample, 'max_age': max_age}
+
+    def open(self, extension):
+        """
+        Create an artifact for a poller to write to.
+
+        Arguments:
+            extension (str): The file extension
+
+        Returns:
+            Artifact: The artifact
+        """
+        artifact = Artifact(self, extension)
+        with self.lock:
+            self.in_memory[artifact] = 0
+        return artifact
+
+    def reserve(self, artifact, size):
+        """
+        Account for bytes about to be written to an artifact held in memory.
+
+        Arguments:
+            artifact (Artifact): The artifact
+            size (int): The number of bytes
+
+        Returns:
+            bool: Whether the bytes fit in memory
+            List(Artifact): Other artifacts to evict to the spool directory
+        """
+        with self.lock:
+            if artifact.size + size > self.memory_threshold:
+                return False, []
+            self.memory_used += size
+            self.in_memory[artifact] = self.in_memory.get(artifact, 0) + size
+            self.in_memory.move_to_end(artifact)
+
+            victims = []
+            used = self.memory_used
+            for victim, victim_size in self.in_memory.items():
+                if used <= self.memory_limit or victim is artifact:
+                    break
+                victims.append(victim)
+                used -= victim_size
+            return True, victims
+
+    def release(self, artifact):
+        """
+        Stop accounting for the memory of a spooled artifact.
+
+        Arguments:
+            artifact (Artifact): The artifact
+        """
+        with self.lock:
+            self.memory_used -= self.in_memory.pop(artifact, 0)
+            self.spooled[artifact] = artifact.created
+
+    def remove(self, artifact):
+        """
+        Forget an artifact which has been persisted or dropped.
+
+        Arguments:
+            artifact (Artifact): The artifact
+        """
+        with self.lock:
+            self.memory_used -= self.in_memory.pop(artifact, 0)
+            self.spooled.pop(artifact, None)
+
+    def get_policy(self, check):
+        """
+        Get the retention policy of a check.
+
+        Arguments:
+            check (Check): The check
+
+        Returns:
+            Dict(str->object): The retention policy
+        """
+        policy = dict(self.policy)
+        if check.artifact_policy is not None:
+            policy.update(check.artifact_policy)
+        return policy
+
+    def object_path(self, digest, extension):
+        """
+        Get the path of the object holding a persisted file.
+
+        Arguments:
+            digest (str): The hex SHA1 of the file
+            extension (str): The file extension
+
+        Returns:
+            str: The path of the object
+        """
+        return '{}/{}/{}.{}'.format(OBJECTS_DIR, digest[:2], digest, extension)
+
+    def persist(self, artifact, check_id, digest):
+        """
+        Persist an artifact, saving it as an object unless an identical one
+        is already stored, and add a reference to it for the check.
+
+        Arguments:
+            artifact (Artifact): The artifact
+            check_id (int): The ID of the check the file was retrieved for
+            digest (str): The hex SHA1 of the artifact
+
+        Returns:
+            str: The path of the reference
+        """
+        obj = self.object_path(digest, artifact.extension)
+        directory = os.path.join(CHECK_FILES_DIR, str(check_id))
+        ref = '{}/{}.{}.{}'.format(directory, datetime.now().strftime(REF_TIME_FORMAT),
+                                   digest, artifact.extension)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(obj):
+            try:
+                os.link(obj, ref)
+                return ref
+            except FileExistsError:
+                # The same file was persisted for the check within the second
+                return ref
+            except FileNotFoundError:
+                # The object was collected since it was found
+                pass
+
+        # The object is saved under a temporary name and referenced before
+        # it is published, so collect never finds it unreferenced
+        temp = '{}.{}{}'.format(obj, uuid.uuid4().hex[:10], TEMP_SUFFIX)
+        artifact.save(temp)
+        try:
+            os.link(temp, ref)
+            os.link(temp, obj)
+        except FileExistsError:
+            # Either the reference or an identical object was saved in the
+            # meantime, and the reference holds the file either way
+            pass
+        finally:
+            os.remove(temp)
+        return ref
+
+    def unref(self, ref):
+        """
+        Delete a reference to a persisted file, deleting the object it
+        refers to if it was the last reference.
+
+        Arguments:
+            ref (str): The path of the reference
+        """
+        pieces = os.path.basename(ref).split('.')
+        os.remove(ref)
+        if len(pieces) == 3 and len(pieces[1]) == 40:
+            obj = self.object_path(pieces[1], pieces[2])
+            try:
+                if os.stat(obj).st_nlink <= 1:
+                    os.remove(obj)
+            except FileNotFoundError:
+                pass
+
+    def collect(self):
+        """
+        Delete every object which is no longer referenced, such as those
+        left behind if the engine stopped while persisting them.
+
+        Returns:
+            int: The number of objects deleted
+        """
+        count = 0
+        if not os.path.isdir(OBJECTS_DIR):
+            return count
+        for prefix in os.scandir(OBJECTS_DIR):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                try:
+                    # Objects being saved are only collected once stale
+                    if entry.name.endswith(TEMP_SUFFIX) and \
+                            time.time() - entry.stat().st_mtime < STALE_TEMP_AGE:
+                        continue
+                    if entry.stat().st_nlink <= 1:
+                        os.remove(entry.path)
+                        count += 1
+                except OSError:
+                    pass
+        return count
+
+    def finish(self, artifact, check, result, digest):
+        """
+        Persist or drop an artifact once its check is done.
+
+        Arguments:
+            artifact (Artifact): The artifact
+            check (Check): The check the artifact was retrieved for
+            result (bool): The result of the check
+            digest (str): The hex SHA1 of the artifact
+
+        Returns:
+            str: The path the artifact was persisted to, or None if dropped
+        """
+        policy = self.get_policy(check)
+        if policy['persist'] == PERSIST_ALL:
+            keep = True
+        elif policy['persist'] == PERSIST_FAILURES:
+            keep = not result or random.random() < policy['sample']
+        else:
+            keep = False
+
+        path = None
+        if keep:
+            try:
+                path = self.persist(artifact, check.id, digest)
+            except Exception as e:
+                print("Failed to persist {}: {}".format(artifact.name, str(e)))
+        artifact.discard()
+        return path
+
+    def sweep(self, checks, abandon_after):
+        """
+        Drop artifacts left behind by polls which never finished, and delete
+        references to persisted files older than their check's maximum age.
+
+        Arguments:
+            checks (List(Check)): The checks to delete old references of
+            abandon_after (float): Seconds after which an artifact which has
+                not been finished is dropped
+        """
+        now = time.monotonic()
+        with self.lock:
+            abandoned = [artifact for artifact in list(self.in_memory) + list(self.spooled)
+                         if now - artifact.created > abandon_after]
+        for artifact in abandoned:
+            artifact.discard()
+
+        for check in checks:
+            max_age = self.get_policy(check)['max_age']
+            directory = os.path.join(CHECK_FILES_DIR, str(check.id))
+            if max_age <= 0 or not os.path.isdir(directory):
+                continue
+            # Objects are shared, so the age of a reference is in its name
+            cutoff = datetime.now() - timedelta(hours=max_age)
+            for entry in os.scandir(directory):
+                try:
+                    created = datetime.strptime(entry.name.split('.')[0], REF_TIME_FORMAT)
+                except ValueError:
+                    continue
+                if created < cutoff:
+                    try:
+                        self.unref(entry.path)
+                    except OSError:
+                        pass
@@ -0,0 +1,63 @@
+"""
+This module contains helpers for batch checkers, which check the results of
+every team's poll of a check in a round at once.
+
+A check function may have a batch version as its `batch` attribute. It is
+given the round's list of (Team, PollResult) for the check along with the
+expected output shared by all of them, and returns the result of each poll
+in the same order. If a batch checker raises, every result is checked with
+the check function itself instead.
+"""
+
+def evaluate(check_function, poll_result, expected):
+    """
+    Check a single poll result, counting any error as a failure.
+
+    Arguments:
+        check_function ((PollResult, List or Dict) -> bool): The check function
+        poll_result (PollResult): The result of the poll
+        expected (List or Dict): The expected output
+
+    Returns:
+        bool: The result of the check
+    """
+    try:
+        return bool(check_function(poll_result, expected))
+    except:
+        return False
+
+def memoize(key):
+    """
+    Decorate a check function with a batch version which checks each
+    distinct poll result once, and reuses that result for every team whose
+    poll returned the same output.
+
+    Arguments:
+        key ((PollResult) -> object): Function returning a hashable key
+            which identifies everything the check function looks at in a
+            poll result, or None if the result should be checked on its own
+
+    Returns:
+        (function) -> function: The decorator
+    """
+    def decorate(check_function):
+        def batch(polls, expected):
+            outcomes = {}
+            results = []
+            for team, poll_result in polls:
+                try:
+                    k = key(poll_result)
+                    hash(k)
+                except Exception:
+                    k = None
+                if k is None:
+                    results.append(evaluate(check_function, poll_result, expected))
+                    continue
+                if k not in outcomes:
+                    outcomes[k] = evaluate(check_function, poll_result, expected)
+                results.append(outcomes[k])
+            return results
+
+        check_function.batch = batch
+        return check_function
+    return decorate
@@ -1,6 +1,9 @@
 """
 This module contains different functions for checking the result of DNS pollers.
 """
+from .batch import memoize
+
+@memoize(lambda poll_result: (poll_result.exception, poll_result.answer))
 def any_match(poll_result, expected):
     """
     Check whether the DNS answer in the given poll_result matches *any* of the
@@ -3,10 +3,38 @@ This module contains different functions for checking the integrity of files
 pulled by file-based pollers.
 """
 
+from threading import Lock
 import hashlib
 import difflib
+import io
+import os
+from .batch import memoize
 REF_PAGES_DIR = 'checkfiles/expected'
 
+def read_file(poll_result):
+    """
+    Read the contents of a polled file, from the artifact store if it is
+    held there.
+
+    Arguments:
+        poll_result (PollResult): The result of polling a file-based service
+
+    Returns:
+        bytes: The contents of the file
+    """
+    if getattr(poll_result, 'artifact', None) is not None:
+        return poll_result.artifact.read()
+    with open(poll_result.file_name, 'rb') as f:
+        return f.read()
+
+def file_key(poll_result):
+    """
+    Identify the contents of a polled file by its hash, so that files are
+    only checked once per distinct contents.
+    """
+    return getattr(poll_result, 'sha1', None)
+
+@memoize(file_key)
 def direct_match(poll_result, expected):
     """
     Check whether the contents of the file matches the expected contents
@@ -25,6 +53,7 @@ def direct_match(poll_result, expected):
     return expected[0] == poll_result.file_contents
 
 
+@memoize(file_key)
 def hash_match(poll_result, expected):
     """
     Check whether the contents of the file matches the expected contents
@@ -40,16 +69,92 @@ def hash_match(poll_result, expected):
     if poll_result.file_name is None: # Failed to pull a file
         return False
 
-    f = open(poll_result.file_name, 'rb')
-    content = f.read()
-    f.close()
-
-    sha1 = hashlib.sha1()
-    sha1.update(content)
-    hex_hash = sha1.hexdigest()
+    # File pollers hash files as they are saved
+    hex_hash = getattr(poll_result, 'sha1', None)
+    if hex_hash is None:
+        hex_hash = hashlib.sha1(read_file(poll_result)).hexdigest()
 
     return hex_hash == expected['hash']
 
+class ReferenceCache(object):
+    """
+    Caches the expected files used by diff_match as the hashes of their
+    lines, so that each is read once rather than once per team per round.
+    A file is read again whenever its modification time changes.
+
+    Attributes:
+        pages (Dict(str->(float, List(int)))): Mapping of file paths to
+            their modification time and the hashes of their lines
+    """
+    def __init__(self):
+        self.pages = {}
+        self.lock = Lock()
+
+    def get(self, path):
+        """
+        Get the hashes of the lines of an expected file.
+
+        Arguments:
+            path (str): The path of the file
+
+        Returns:
+            List(int): The hash of each line of the file
+        """
+        mtime = os.stat(path).st_mtime
+        with self.lock:
+            cached = self.pages.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r') as f:
+            lines = [hash(line) for line in f]
+        with self.lock:
+            self.pages[path] = (mtime, lines)
+        return lines
+
+reference_cache = ReferenceCache()
+
+def count_diff_lines(page, expected_page, limit):
+    """
+    Count the lines which differ between two pages, as the sum over the
+    hunks of a unified diff of the larger of the number of lines removed
+    and added in the hunk. Stops counting once the count passes `limit`.
+
+    Arguments:
+        page (List(int)): The hash of each line of the polled page
+        expected_page (List(int)): The hash of each line of the expected page
+        limit (float): The number of differing lines beyond which the exact
+            count does not matter
+
+    Returns:
+        int: The number of differing lines, or a number greater than limit
+    """
+    if page == expected_page:
+        return 0
+
+    # Every hunk counts at least the difference in length it makes, so
+    # pages which differ enough in length need no diff at all
+    num_diff = abs(len(page) - len(expected_page))
+    if num_diff > limit:
+        return num_diff
+
+    # Likewise every line of the longer page which is not matched counts,
+    # and quick_ratio bounds the number of matched lines from above
+    matcher = difflib.SequenceMatcher(None, page, expected_page)
+    max_matched = matcher.quick_ratio() * (len(page) + len(expected_page)) / 2
+    num_diff = max(len(page), len(expected_page)) - max_matched
+    if num_diff > limit:
+        return num_diff
+
+    num_diff = 0
+    for group in matcher.get_grouped_opcodes():
+        removed = sum([i2 - i1 for tag, i1, i2, j1, j2 in group if tag != 'equal'])
+        added = sum([j2 - j1 for tag, i1, i2, j1, j2 in group if tag != 'equal'])
+        num_diff += max(removed, added)
+        if num_diff > limit:
+            break
+    return num_diff
+
+@memoize(file_key)
 def diff_match(poll_result, expected):
     """
     Check whether the contents of the file matches the expected contents
@@ -67,37 +172,15 @@ def diff_match(poll_result, expected):
 
     tolerance = expected['tolerance']
 
+    # Get expected file
+    expected_page = reference_cache.get('%s/%s' % (REF_PAGES_DIR, expected['file']))
+    if len(expected_page) == 0:
+        return False
+
     # Get polled file
-    f = open(poll_result.file_name, 'r')
-    page = f.readlines()
+    content = read_file(poll_result).decode('utf-8', errors='replace')
+    page = [hash(line) for line in io.StringIO(content, newline=None)]
 
-    # Get expected file
-    expected_file = open('%s/%s' % (REF_PAGES_DIR, expected['file']), 'r')
-    expected_page = expected_file.readlines()
-    
-    # Diff the files and separate the headings and differences
-    diff = difflib.unified_diff(page, expected_page)
-    diff_lines = [line for line in diff][2:]
-    headings = [line for line in diff_lines if line[0] == '@']
-    diffs = [line for line in diff_lines if line[0] in ['+', '-']]
-
-    # Count the number of lines that are different based on the diff headings
-    num_diff = 0 
-    for heading in headings:
-        locations = heading.split(' ')[1:-1]
-        lengths = []
-        for location in locations:
-            if ',' in location:
-                lengths.append(int(location.split(',')[1]))
-            else:
-                lengths.append(0)
-        num_diff += abs(lengths[1] - lengths[0])
-    num_diff += (len(diffs) - num_diff) / 2 
-    
     # Determine the percent difference from the expected page
-    difference = num_diff / float(len(expected_page))
-
-    if difference <= tolerance:
-        return True
-    else:
-        return False 
+    limit = tolerance * len(expected_page)
+    return count_diff_lines(page, expected_page, limit) <= limit
@@ -1,5 +1,29 @@
 from base64 import b64encode
 
+def decode_output(output):
+    """
+    Decode all of the values in the output of an LDAP poll in place, as
+    UTF-8 if possible and base64 otherwise. Values which are already
+    decoded are left as they are, so output decoded by a batch check can
+    be checked again.
+
+    Arguments:
+        output (Dict(str->List)): The output of an LDAP poll
+
+    Returns:
+        Dict(str->List(str)): The decoded output
+    """
+    for key in output.keys():
+        for i in range(len(output[key])):
+            val = output[key][i]
+            if isinstance(val, str):
+                continue
+            try:
+                output[key][i] = val.decode('utf8')
+            except:
+                output[key][i] = b64encode(val).decode('utf8')
+    return output
+
 def match_ldap_output(poll_result, expected):
     """
     Check whether the output of an LDAP poll matches what is expected.
@@ -14,15 +38,35 @@ def match_ldap_output(poll_result, expected):
     if poll_result.output is None:
         return False
 
-    output = poll_result.output
+    output = decode_output(poll_result.output)
+    return output == expected
 
-    # Decode all strings in output
-    for key in output.keys():
-        for i in range(len(output[key])):
-            val = output[key][i]
-            try:
-                output[key][i] = val.decode('utf8')
-            except:
-                output[key][i] = b64encode(val).decode('utf8')
+def match_ldap_output_batch(polls, expected):
+    """
+    Check whether the outputs of every team's LDAP poll match what is
+    expected, decoding and comparing each distinct output only once.
 
-    return output == expected
+    Arguments:
+        polls (List(Team, LdapPollResult)): The result of each team's poll
+        expected (Dict): The expected output
+
+    Returns:
+        List(bool): Whether each poll result matches the expected output
+    """
+    decoded = {}
+    results = []
+    for team, poll_result in polls:
+        if poll_result.output is None:
+            results.append(False)
+            continue
+
+        key = repr(sorted(poll_result.output.items()))
+        if key not in decoded:
+            output = decode_output(poll_result.output)
+            decoded[key] = (output, output == expected)
+        # Results with the same output share the decoded copy
+        poll_result.output, result = decoded[key]
+        results.append(result)
+    return results
+
+match_ldap_output.batch = match_ldap_output_batch
@@ -1,4 +1,7 @@
 
+from .batch import memoize
+
+@memoize(lambda poll_result: repr(poll_result.output))
 def match_sql_output(poll_result, expected):
     if poll_result.output is None:
         return False
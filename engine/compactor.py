@@ -0,0 +1,120 @@
+"""
+This module contains the compactor which enforces the retention policy for
+the payloads of check results.
+"""
+from model import Model
+import db
+import json
+import time
+import zlib
+
+ARCHIVE_INSERT = ("INSERT INTO result_archive (result_id, payload) "
+                  "VALUES (%s, %s) ON DUPLICATE KEY UPDATE result_id=result_id")
+
+class ResultCompactor(object):
+    """
+    Strips the poll input and poll result from old successful results.
+
+    Failures are kept in full, since they are what gets debugged, and so are
+    the most recent `keep_successes` successes of each team and check. Older
+    successes keep only their outcome, time and latency. If archiving is
+    enabled, their payloads are first compressed into result_archive, where
+    the web interface can still find them.
+
+    Settings are reloaded every pass, so the policy can be changed while the
+    engine runs.
+
+    Attributes:
+        model (Model): Model used to load the settings
+        compacted (Dict((int, int)->int)): Mapping of each team and check to
+            the ID of the last result already checked, so each pass only
+            reads newer results
+    """
+    def __init__(self):
+        self.model = Model()
+        self.compacted = {}
+
+    def compact_results(self):
+        """
+        Compact results every retention interval until the engine is stopped.
+        """
+        while True:
+            self.model.load_settings()
+            settings = self.model.settings
+            if not settings['running']:
+                return
+            if settings['retention_enabled']:
+                try:
+                    count = self.compact(settings['retention_keep_successes'],
+                                         settings['retention_archive'],
+                                         settings['retention_batch_size'])
+                    if count > 0:
+                        print("Compacted {} results".format(count))
+                except Exception as e:
+                    print("Failed to compact results: {}".format(str(e)))
+            time.sleep(settings['retention_interval'])
+
+    def compact(self, keep_successes, archive, batch_size):
+        """
+        Compact the successful results older than the most recent few of
+        each team and check.
+
+        Arguments:
+            keep_successes (int): Number of recent successes to keep in full
+            archive (bool): Whether to archive payloads before removing them
+            batch_size (int): Maximum number of results compacted at once
+
+        Returns:
+            int: The number of results compacted
+        """
+        count = 0
+        teams = db.get('team', ['id'])
+        checks = db.get('service_check', ['id'])
+        for team_id, in teams:
+            for check_id, in checks:
+                key = (team_id, check_id)
+                rows = db.get('result', ['id'],
+                              where='team_id=%s AND check_id=%s AND result=1',
+                              orderby='id DESC', args=(team_id, check_id),
+                              limit=keep_successes + 1)
+                if len(rows) <= keep_successes:
+                    continue
+                cutoff = rows[-1][0]
+                scanned = batch_size
+                while scanned == batch_size:
+                    scanned, done = self.compact_range(team_id, check_id,
+                                                       self.compacted.get(key, 0),
+                                                       cutoff, archive, batch_size)
+                    count += done
+                self.compacted[key] = cutoff
+        return count
+
+    def compact_range(self, team_id, check_id, after, cutoff, archive, batch_size):
+        """
+        Compact a batch of successful results with IDs in (after, cutoff].
+
+        Returns:
+            int: The number of results scanned
+            int: The number of results compacted
+        """
+        rows = db.get('result', ['id', 'poll_input', 'poll_result'],
+                      where=('team_id=%s AND check_id=%s AND result=1 '
+                             'AND id > %s AND id <= %s'),
+                      orderby='id ASC', args=(team_id, check_id, after, cutoff),
+                      limit=batch_size)
+        if len(rows) == 0:
+            return 0, 0
+        scanned = len(rows)
+        last_id = rows[-1][0]
+
+        rows = [row for row in rows if row[2] != '']
+        commands = []
+        if archive:
+            payloads = [(result_id, zlib.compress(json.dumps([poll_input, poll_result]).encode()))
+                        for result_id, poll_input, poll_result in rows]
+            commands.append((ARCHIVE_INSERT, payloads))
+        ids = [(result_id,) for result_id, poll_input, poll_result in rows]
+        commands.append(("UPDATE result SET poll_input='', poll_result='' WHERE id=%s", ids))
+        db.execute_batches(commands)
+        self.compacted[(team_id, check_id)] = last_id
+        return scanned, len(rows)
@@ -0,0 +1,177 @@
+"""
+This module contains the coordinator used to run the scoring engine as a set
+of shards spread across processes or hosts.
+"""
+from model import Model
+from .round_bitmap import RoundBitmap
+import db
+import os
+import subprocess
+import sys
+import time
+import random
+
+# Seconds without a heartbeat before a shard is considered dead
+SHARD_TIMEOUT = 30
+
+ENGINE_MANAGER = os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), 'engine_manager.py')
+
+class Coordinator(object):
+    """
+    Allocates a single shared check round for every shard of the engine.
+
+    Each interval the coordinator inserts one row into check_log. Every shard
+    polls its own teams for that round and reports its progress through a
+    heartbeat in engine_shard. A round is finished once every live shard has
+    completed it and every team has been polled by one of them. Shards which
+    stop sending heartbeats are reported as dead, and the round is held open
+    until their teams are polled by a live shard, such as the dead shard
+    once it restarts. Shards started by the coordinator as local processes
+    are restarted if they exit.
+
+    Attributes:
+        model (Model): Model used to load the global settings
+        num_workers (int): Number of local shard processes to run
+        workers (Dict(int->Popen)): Mapping of shard numbers to local processes
+        dead_shards (Set(str)): Names of shards currently considered dead
+        stalled_round (int): The last round reported as unable to finish for
+            lack of live shards or of shards polling some teams
+    """
+    def __init__(self, num_workers=0):
+        self.model = Model()
+        self.num_workers = num_workers
+        self.workers = {}
+        self.dead_shards = set()
+        self.stalled_round = None
+
+    def start(self):
+        db.delete('engine_shard', None)
+        check_round = None
+        while True:
+            self.model.load_settings()
+            settings = self.model.settings
+            if not settings['running']:
+                print("Stopped")
+                self.stop_workers()
+                return
+
+            self.check_workers()
+
+            if check_round is not None:
+                if self.finish_round(check_round):
+                    check_round = None
+                elif settings['overlap'] == 'skip':
+                    print("Round {} still running, skipping round".format(check_round))
+                else:
+                    print("Round {} still running, delaying round".format(check_round))
+                    while not self.finish_round(check_round):
+                        self.check_workers()
+                        time.sleep(1)
+                    check_round = None
+
+            if check_round is None:
+                print("New Round of Checks")
+                self.log_default_creds()
+                check_round = db.execute('INSERT INTO check_log () VALUES ()')
+
+            wait = settings['interval']
+            offset = random.randint(-settings['jitter'], settings['jitter'])
+            wait += offset
+            print("Wait: " + str(wait))
+            time.sleep(wait)
+
+    def finish_round(self, check_round):
+        """
+        Check whether every live shard has completed the given round and
+        every team was polled by one of them, and if so record the end of
+        the round.
+
+        Arguments:
+            check_round (int): The check round
+
+        Returns:
+            bool: Whether the round is finished
+        """
+        live = db.get('engine_shard', ['name', 'check_round', 'teams'],
+                      where='heartbeat > NOW() - INTERVAL %s SECOND',
+                      args=(SHARD_TIMEOUT,))
+        dead = db.get('engine_shard', ['name', 'host'],
+                      where='heartbeat <= NOW() - INTERVAL %s SECOND',
+                      args=(SHARD_TIMEOUT,))
+
+        dead_names = set()
+        for name, host in dead:
+            dead_names.add(name)
+            if name not in self.dead_shards:
+                print("Shard {} on {} is dead".format(name, host))
+        for name in self.dead_shards - dead_names:
+            print("Shard {} has recovered".format(name))
+        self.dead_shards = dead_names
+
+        # A round is never finished without a shard having polled it
+        if len(live) == 0:
+            if self.stalled_round != check_round:
+                print("No live shards, round {} cannot finish".format(check_round))
+                self.stalled_round = check_round
+            return False
+        polled = set()
+        for name, completed, teams in live:
+            if completed is None or completed < check_round:
+                return False
+            polled.update([int(tid) for tid in teams.split(',') if tid != ''])
+
+        # Teams of dead or missing shards hold the round open, rather than
+        # the round finishing with them unpolled
+        unpolled = [team_id for team_id, in db.get('team', ['id'], orderby='id ASC')
+                    if team_id not in polled]
+        if len(unpolled) > 0:
+            if self.stalled_round != check_round:
+                print("Teams {} not polled by any live shard, round {} cannot "
+                      "finish".format(','.join([str(tid) for tid in unpolled]),
+                                      check_round))
+                self.stalled_round = check_round
+            return False
+
+        db.modify('check_log', 'end_time=NOW()', (check_round,),
+                  where='check_round=%s')
+        rows = db.get('check_log', ['num_polls', 'num_timeouts',
+                      'TIMESTAMPDIFF(SECOND, time, end_time)'],
+                      where='check_round=%s', args=(check_round,))
+        num_polls, num_timeouts, duration = rows[0]
+        print("Round {} finished in {}s across {} shards, {} polls, "
+              "{} timeouts".format(check_round, duration, len(live),
+                                   num_polls, num_timeouts))
+        try:
+            RoundBitmap.build(check_round)
+        except Exception as e:
+            print("Failed to build bitmap for round {}: {}".format(check_round, str(e)))
+        return True
+
+    def check_workers(self):
+        """
+        Start any local shard processes which are not running.
+        """
+        for shard in range(1, self.num_workers + 1):
+            worker = self.workers.get(shard)
+            if worker is not None and worker.poll() is None:
+                continue
+            if worker is not None:
+                print("Shard {}/{} exited, restarting".format(shard, self.num_workers))
+            shard_arg = '{}/{}'.format(shard, self.num_workers)
+            cmd = [sys.executable, '-u', ENGINE_MANAGER, 'start',
+                   '--shard', shard_arg]
+            self.workers[shard] = subprocess.Popen(cmd)
+
+    def stop_workers(self):
+        """
+        Wait for the local shard processes to stop.
+        """
+        for worker in self.workers.values():
+            worker.wait()
+        self.workers = {}
+
+    def log_default_creds(self):
+        cmd = ('INSERT INTO default_creds_log (team_id, perc_default) '
+                'SELECT team_id,AVG(is_default) FROM credential GROUP BY team_id')
+        db.execute(cmd)
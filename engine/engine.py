@@ -1,31 +1,125 @@
 from .engine_model import EngineModel
+from .scheduler import RoundScheduler
+from .result_writer import ResultWriter
+from .sla import SlaTracker
+from .round_bitmap import RoundBitmap
+from .artifacts import ArtifactStore
+from .polling.file_poller import FilePoller
 from threading import Thread
 import db
+import socket
 import time, datetime
 import random
+import re
 
 class ScoringEngine(object):
+    """
+    The scoring engine, which polls every team's services each round.
 
-    def __init__(self, team_num=None):
+    The engine polls all teams by default. Given a shard or a list of team
+    IDs, it runs as a shard of a coordinated engine instead, polling only its
+    own teams for rounds allocated by the Coordinator.
+
+    Attributes:
+        em (EngineModel): The engine's data model
+        team_num (int): Index of the single team to poll, if any
+        teams (List(Team)): The teams this engine polls
+        shard_name (str): The name of this engine's shard, if sharded
+        sla (SlaTracker): The tracker used to record SLA violations
+        artifacts (ArtifactStore): The store holding files retrieved by polls
+        writer (ResultWriter): The writer used to batch results into the database
+        scheduler (RoundScheduler): The scheduler used to run each round
+    """
+
+    def __init__(self, team_num=None, shard=None, team_ids=None):
         self.em = EngineModel()
         self.em.load_db()
         self.em.teams.sort(key=lambda t: t.name)
         self.team_num = team_num
+        self.sla = SlaTracker(self.em.settings['sla_threshold'])
+        self.sla.load()
+        self.shard_name = None
+        if shard is not None:
+            index, count = shard
+            self.teams = self.em.teams[index-1::count]
+            self.shard_name = '{}/{}'.format(index, count)
+        elif team_ids is not None:
+            self.teams = [t for t in self.em.teams if t.id in team_ids]
+            self.shard_name = 'teams:{}'.format(
+                    ','.join([str(tid) for tid in sorted(team_ids)]))
+        elif team_num is not None:
+            self.teams = [self.em.teams[team_num]]
+        else:
+            self.teams = self.em.teams
+
+        settings = self.em.settings
+        self.artifacts = ArtifactStore(settings['artifacts_memory_limit'],
+                                       settings['artifacts_memory_threshold'],
+                                       settings['artifacts_spool_dir'],
+                                       settings['artifacts_persist'],
+                                       settings['artifacts_sample'],
+                                       settings['artifacts_max_age'])
+        FilePoller.store = self.artifacts
+        self.artifacts.collect()
+        self.writer = ResultWriter(self.em.settings['batch_size'],
+                                   self.em.settings['flush_interval'],
+                                   self.em.settings['max_pending'],
+                                   self.spool_path(),
+                                   self.em.settings['latency_threshold'],
+                                   self.em.settings['retry_interval'],
+                                   self.sla)
+        self.scheduler = RoundScheduler(self.em.settings['concurrency'],
+                                        self.em.settings['workers'],
+                                        self.em.settings['timeout'],
+                                        self.em.settings['dispatch'],
+                                        self.writer)
+
+    def spool_path(self):
+        """
+        Get the path of this engine's result spool. Each shard, and each
+        engine polling a single team, has its own spool, named after what it
+        polls so that it is replayed if the engine restarts.
+
+        Returns:
+            str: The path of the spool
+        """
+        path = self.em.settings['spool']
+        if self.shard_name is not None:
+            path += '.' + re.sub(r'[^A-Za-z0-9]+', '-', self.shard_name)
+        elif self.team_num is not None:
+            path += '.team-{}'.format(self.team_num + 1)
+        return path
 
     def start(self):
+        if self.shard_name is not None:
+            self.start_shard()
+            return
+
+        round_thread = None
         while True:
             self.em.load_settings()
             running = self.em.settings['running']
             interval = self.em.settings['interval']
             jitter = self.em.settings['jitter']
 
-            if running:
-                self.log_default_creds()
-                self.check()
-            else:
+            if not running:
                 print("Stopped")
+                if round_thread is not None:
+                    round_thread.join()
                 return
 
+            if round_thread is not None and round_thread.is_alive():
+                if self.em.settings['overlap'] == 'skip':
+                    print("Previous round still running, skipping round")
+                else:
+                    print("Previous round still running, delaying round")
+                    round_thread.join()
+
+            if round_thread is None or not round_thread.is_alive():
+                self.log_default_creds()
+                round_thread = Thread(target=self.check)
+                round_thread.start()
+
             wait = interval
             print("Interval: " + str(wait))
             offset = random.randint(-jitter, jitter)
@@ -34,20 +128,151 @@ class ScoringEngine(object):
             print("Wait: " + str(wait))
             time.sleep(wait)
 
+    def start_shard(self):
+        """
+        Run as a shard of a coordinated engine. Rounds are allocated by the
+        coordinator in check_log, and the shard polls its own teams for each
+        new round while reporting a heartbeat.
+
+        A shard resumes from the last round it recorded completing, so a
+        round which is still in progress when it starts or restarts is
+        polled rather than reported as completed.
+        """
+        print("Starting shard {}".format(self.shard_name))
+        rows = db.get('engine_shard', ['check_round'], where='name=%s',
+                      args=(self.shard_name,))
+        self.completed_round = rows[0][0] if len(rows) > 0 else None
+        started_round = self.completed_round
+        round_thread = None
+        while True:
+            self.em.load_settings()
+            if not self.em.settings['running']:
+                print("Stopped")
+                if round_thread is not None:
+                    round_thread.join()
+                return
+
+            self.heartbeat()
+            if round_thread is None or not round_thread.is_alive():
+                # Only the newest round is polled, and only until the
+                # coordinator finishes it
+                rows = db.get('check_log', ['check_round', 'end_time'],
+                              orderby='check_round DESC', limit=1)
+                latest = None
+                if len(rows) > 0 and rows[0][1] is None:
+                    latest = rows[0][0]
+                if latest is not None and (started_round is None or latest > started_round):
+                    started_round = latest
+                    round_thread = Thread(target=self.run_shard_round,
+                                          args=(latest,))
+                    round_thread.start()
+            time.sleep(1)
+
+    def run_shard_round(self, check_round):
+        """
+        Run a round allocated by the coordinator and record its completion.
+
+        Arguments:
+            check_round (int): The check round
+        """
+        self.run_round(check_round)
+        self.completed_round = check_round
+        self.heartbeat()
+
+    def heartbeat(self):
+        """
+        Record that this shard is alive, along with the last round it
+        completed.
+        """
+        teams = ','.join([str(t.id) for t in self.teams])
+        cmd = ('INSERT INTO engine_shard (name, host, teams, check_round, heartbeat) '
+               'VALUES (%s, %s, %s, %s, NOW()) ON DUPLICATE KEY UPDATE '
+               'host=VALUES(host), teams=VALUES(teams), '
+               'check_round=VALUES(check_round), heartbeat=NOW()')
+        db.execute(cmd, (self.shard_name, socket.gethostname(), teams,
+                         self.completed_round))
+
     def check(self):
         print("New Round of Checks")
+        check_round = db.execute('INSERT INTO check_log () VALUES ()')
+        self.run_round(check_round)
+        db.modify('check_log', 'end_time=NOW()', (check_round,),
+                  where='check_round=%s')
+        self.build_bitmap(check_round)
+
+    def build_bitmap(self, check_round):
+        """
+        Build the result bitmap of a finished round. While results are
+        held in the spool, the bitmap is left to be built once the result
+        writer replays them.
+
+        Arguments:
+            check_round (int): The check round
+        """
+        if self.writer.spool.pending():
+            print("Results spooled, deferring bitmap for round {}".format(check_round))
+            return
+        try:
+            RoundBitmap.build(check_round)
+        except Exception as e:
+            print("Failed to build bitmap for round {}: {}".format(check_round, str(e)))
+
+    def run_round(self, check_round):
+        """
+        Poll this engine's teams for the given round, adding the number of
+        polls and timeouts to the round's log.
+
+        Arguments:
+            check_round (int): The check round
+        """
         self.em.reload_credentials()
 
-        check_round = db.execute('INSERT INTO check_log () VALUES ()')
+        settings = self.em.settings
+        timeout = settings['timeout']
+        self.sla.threshold = settings['sla_threshold']
+        self.artifacts.configure(settings['artifacts_memory_limit'],
+                                 settings['artifacts_memory_threshold'],
+                                 settings['artifacts_spool_dir'],
+                                 settings['artifacts_persist'],
+                                 settings['artifacts_sample'],
+                                 settings['artifacts_max_age'])
+        self.scheduler.configure(settings['concurrency'],
+                                 settings['workers'], timeout,
+                                 settings['dispatch'])
+        for check in self.em.checks:
+            check.poller.timeout = timeout
+            check.input_storage = settings['poll_input_storage']
+
+        polls = []
         for vapp in self.em.vapps:
             for system in vapp.systems:
-                if self.team_num is None:
-                    system.check(check_round, self.em.teams)
-                else:
-                    system.check(check_round, [self.em.teams[self.team_num]])
+                polls.extend(system.get_polls(self.teams))
+
+        start = time.time()
+        db.modify('check_log', 'num_polls=num_polls+%s',
+                  (len(polls), check_round), where='check_round=%s')
+        window = settings['interval'] * settings['spread']
+        timeouts = self.scheduler.run_round(check_round, polls, window)
+        self.writer.flush()
+        # Polls still running past their timeout are abandoned by the
+        # scheduler, along with any files they were retrieving
+        self.artifacts.sweep(self.em.checks, settings['interval'] + timeout)
+        duration = time.time() - start
+        db.modify('check_log', 'num_timeouts=num_timeouts+%s',
+                  (timeouts, check_round), where='check_round=%s')
+
+        budget = duration / settings['interval']
+        print("Round {} finished in {:.1f}s ({:.0%} of interval), "
+              "{} polls, {} timeouts".format(check_round, duration, budget,
+                                              len(polls), timeouts))
+        stats = self.writer.get_stats()
+        print("Result writer: {} rows in {} flushes, {:.3f}s avg / {:.3f}s "
+              "max flush latency, {} spooled, {} replayed, {} failed".format(
+                  stats['rows'], stats['flushes'], stats['avg_latency'],
+                  stats['max_latency'], stats['spooled_rows'],
+                  stats['replayed_rows'], stats['failed_rows']))
 
     def log_default_creds(self):
         cmd = ('INSERT INTO default_creds_log (team_id, perc_default) '
                 'SELECT team_id,AVG(is_default) FROM credential GROUP BY team_id')
         db.execute(cmd)
-
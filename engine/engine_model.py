@@ -21,7 +21,9 @@ class EngineModel(Model):
                 poll_input = cio.poll_input
                 input_class_str, input_args = json.loads(poll_input)
                 input_class = load_module(input_class_str)
-                poll_input = input_class.deserialize(input_class, input_args, self.teams, self.credentials)
+                poll_input = input_class.deserialize(input_class, input_args,
+                                                     self.teams_by_id,
+                                                     self.credentials_by_id)
 
                 cio.poll_input = poll_input
         return check_ios
@@ -2,11 +2,43 @@ import random
 import copy
 import json
 import db
-from threading import Thread
 from enum import IntEnum
 import datetime
+import time
 from .polling.poller import PollResult
 
+RESULT_INSERT = ("INSERT INTO result (check_id, check_io_id, team_id, "
+                 "check_round, time, poll_input, poll_result, result, latency) "
+                 "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                 "ON DUPLICATE KEY UPDATE id=id")
+
+# Keeps the newest result for each team and check. Columns are assigned in
+# order, so check_round must be updated last.
+LATEST_UPSERT = ("INSERT INTO latest_result (team_id, check_id, check_round, "
+                 "time, result) VALUES (%s, %s, %s, %s, %s) "
+                 "ON DUPLICATE KEY UPDATE "
+                 "time=IF(VALUES(check_round) >= check_round, VALUES(time), time), "
+                 "result=IF(VALUES(check_round) >= check_round, VALUES(result), result), "
+                 "check_round=GREATEST(check_round, VALUES(check_round))")
+
+def write_results(rows, sla=None):
+    """
+    Insert result rows and update the latest result for each team and check
+    in a single transaction.
+
+    Arguments:
+        rows (List(Tuple)): The values of each row, in the order of RESULT_INSERT
+        sla (SlaTracker): Optional, tracker to record SLA violations with
+    """
+    latest = [(row[2], row[0], row[3], row[4], row[7]) for row in rows]
+    commands = [(RESULT_INSERT, rows), (LATEST_UPSERT, latest)]
+    if sla is not None:
+        runs, violations = sla.evaluate(rows)
+        commands.extend(sla.commands(runs, violations))
+    db.execute_batches(commands)
+    if sla is not None:
+        sla.commit(runs)
+
 class Team(object):
     """
     A Team in the competition.
@@ -98,18 +130,21 @@ class System(object):
         self.host = host
         self.checks = checks
 
-    def check(self, check_round, teams):
+    def get_polls(self, teams):
         """
-        Conduct all checks on this service for every team in parallel.
+        Gather the polls for every check on this system for every team.
         
         Arguments:
-            check_round (int): The check round
             teams (List(Team)): The teams to run checks on
+
+        Returns:
+            List(Check, CheckIO, PollInput): The polls to run this round
         """
+        polls = []
         for check in self.checks:
-            thread = Thread(target=check.check,
-                            args=(check_round, teams))
-            thread.start()
+            for check_io, poll_input in check.get_polls(teams):
+                polls.append((check, check_io, poll_input))
+        return polls
 
     def get_ip(self, team_id):
         """
@@ -139,47 +174,86 @@ class Check(object):
         check_function ((PollResult, List or Dict) -> bool): The function used to check the output of the poller
         check_ios (List(CheckIO)): All of the possible input-output pairs which can be used with this check
         poller (Poller): The poller used to run this check against the service
+        input_storage (str): How poll inputs are stored with results, either
+            'compact' (only the team and credential IDs) or 'full', set by the
+            engine from the poll input storage setting
+        artifact_policy (Dict(str->object)): Overrides of the artifact store's
+            retention policy for files retrieved by this check, if any
     """
+    input_storage = 'compact'
 
-    def __init__(self, id, name, port, check_function, check_ios, poller):
+    def __init__(self, id, name, port, check_function, check_ios, poller,
+                 artifact_policy=None):
         self.id = id
         self.name = name
         self.port = port
         self.check_function = check_function
         self.check_ios = check_ios
         self.poller = poller
+        self.artifact_policy = artifact_policy
 
-    def check(self, check_round, teams):
+    def get_polls(self, teams):
         """
-        Select a random input-output pair and run a check against all
-        teams in parallel.
+        Select a random input-output pair and generate the polls needed to
+        check all teams with it.
 
         Arguments:
-            check_round (int): The check round
             teams (List(Team)): The list of teams to check
+
+        Returns:
+            List(CheckIO, PollInput): The input-output pair and the
+                team-specific poll input for each poll
         """
         check_io = random.choice(self.check_ios)
         poll_inputs = check_io.get_poll_inputs(teams)
-        for poll_input in poll_inputs:
-            thread = Thread(target=self.check_single,
-                            args=(check_round, check_io.id, poll_input,check_io.expected))
-            thread.start()
+        return [(check_io, poll_input) for poll_input in poll_inputs]
 
-    def check_single(self, check_round, check_io_id, poll_input, expected):
+    def poll(self, poll_input):
         """
-        Conduct a check against a single team and store the result.
-        
+        Poll the service of a single team.
+
         Arguments:
-            check_round (int): The check round
-            check_io (CheckIO): The ID of the check input-output pair used in the check
             poll_input (PollInput): The input to the poller
-            expected (List or Dict): The expected output from the poller
+
+        Returns:
+            PollResult: The output of the poller
         """
         try:
             poll_result = self.poller.poll(poll_input)
         except Exception as e:
             poll_result = PollResult(e)
+        return poll_result
+
+    def timed_poll(self, poll_input):
+        """
+        Poll the service of a single team, measuring how long it takes.
+
+        Arguments:
+            poll_input (PollInput): The input to the poller
+
+        Returns:
+            PollResult: The output of the poller
+            float: The number of seconds the poll took
+        """
+        start = time.monotonic()
+        poll_result = self.poll(poll_input)
+        return poll_result, time.monotonic() - start
 
+    def check_single(self, check_round, check_io_id, poll_input, poll_result,
+                     expected, writer=None, latency=None):
+        """
+        Check the result of polling a single team and store the result.
+        
+        Arguments:
+            check_round (int): The check round
+            check_io (CheckIO): The ID of the check input-output pair used in the check
+            poll_input (PollInput): The input to the poller
+            poll_result (PollResult): The output of the poller
+            expected (List or Dict): The expected output from the poller
+            writer (ResultWriter, optional): The writer to queue the result
+                with. If None, the result is written immediately.
+            latency (float, optional): The number of seconds the poll took
+        """
         try:
             result = self.check_function(poll_result, expected)
         except:
@@ -187,10 +261,52 @@ class Check(object):
 
         team_id = poll_input.team.id
         self.store_result(check_round, check_io_id, team_id, poll_input,
-                          poll_result, result)
+                          poll_result, result, writer, latency)
+
+    @property
+    def batched(self):
+        """
+        Whether the check function has a batch version which checks every
+        team's poll result of a round at once.
+        """
+        return getattr(self.check_function, 'batch', None) is not None
+
+    def check_batch(self, check_round, check_io_id, polls, expected,
+                    writer=None):
+        """
+        Check the results of polling every team with the batch version of
+        the check function and store the results. If the batch version
+        fails, each result is checked on its own instead.
+
+        Arguments:
+            check_round (int): The check round
+            check_io_id (int): The ID of the check input-output pair used in the check
+            polls (List(PollInput, PollResult, float)): The input to the
+                poller, its output and the number of seconds it took, for
+                each team
+            expected (List or Dict): The expected output from the poller
+            writer (ResultWriter, optional): The writer to queue the results
+                with. If None, the results are written immediately.
+        """
+        try:
+            results = self.check_function.batch(
+                    [(poll_input.team, poll_result) for poll_input, poll_result, latency in polls],
+                    expected)
+            if len(results) != len(polls):
+                raise Exception('{} results for {} polls'.format(len(results), len(polls)))
+        except Exception as e:
+            print("Batch check {} failed: {}".format(self.name, str(e)))
+            for poll_input, poll_result, latency in polls:
+                self.check_single(check_round, check_io_id, poll_input,
+                                  poll_result, expected, writer, latency)
+            return
+
+        for (poll_input, poll_result, latency), result in zip(polls, results):
+            self.store_result(check_round, check_io_id, poll_input.team.id,
+                              poll_input, poll_result, result, writer, latency)
 
     def store_result(self, check_round, check_io_id, team_id, poll_input,
-                     poll_result, result):
+                     poll_result, result, writer=None, latency=None):
         """
         Store the result of a check in the database.
 
@@ -204,12 +320,21 @@ class Check(object):
             poll_result (PollResult): The output of the poller used in
                 the check
             result (bool): The result of the check
+            writer (ResultWriter, optional): The writer to queue the result
+                with. If None, the result is written immediately.
+            latency (float, optional): The number of seconds the poll took
         """
-        cmd = ("INSERT INTO result (check_id, check_io_id, team_id, "
-	       "check_round, time, poll_input, poll_result, result) "
-               "VALUES (%s, %s, %s, %s, NOW(), %s, %s, %s)")
-
-        poll_input = json.dumps(poll_input, default=poll_input.serialize)
+        # Persist or drop the retrieved file now that it has been checked
+        artifact = getattr(poll_result, 'artifact', None)
+        if artifact is not None:
+            poll_result.file_name = artifact.store.finish(artifact, self, result,
+                                                          poll_result.sha1)
+            poll_result.artifact = None
+
+        if self.input_storage == 'compact':
+            poll_input = json.dumps(poll_input.serialize_compact())
+        else:
+            poll_input = json.dumps(poll_input, default=poll_input.serialize)
         try:
             poll_result = json.dumps(poll_result, default=poll_result.serialize)
         except Exception as e:
@@ -218,8 +343,13 @@ class Check(object):
             print(poll_result.__dict__)
             return
 
-        db.execute(cmd, (self.id, check_io_id, team_id, check_round,
-                         poll_input, poll_result, result))
+        row = (self.id, check_io_id, team_id, check_round,
+               datetime.datetime.now(), poll_input, poll_result, result,
+               latency)
+        if writer is None:
+            write_results([row])
+        else:
+            writer.put(row)
 
 
 class CheckIO(object):
@@ -293,10 +423,11 @@ class Result(object):
         poll_result (PollResult): The specific poller output retrieved from
             the poller
         result (bool): The result of the check
+        latency (float): The number of seconds the poll took, if known
     """
     
     def __init__(self, id, check, check_io, team, check_round,
-                 time, poll_input, poll_result, result):
+                 time, poll_input, poll_result, result, latency=None):
         self.id = int(id)
         self.check = check
         self.check_io = check_io
@@ -306,6 +437,7 @@ class Result(object):
         self.poll_input = poll_input
         self.poll_result = poll_result
         self.result = result
+        self.latency = latency
 
 
 class PCRStatus(IntEnum):
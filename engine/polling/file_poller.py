@@ -1,12 +1,153 @@
 from datetime import datetime
-import random
-import string
+import hashlib
+import uuid
 import os
-from .poller import Poller
+from .poller import Poller, PollResult
+from ..artifacts import Artifact
 
 REF_PAGES_DIR = 'checkfiles'
 
+# Size of the chunks files are read in when digesting them after the fact
+CHUNK_SIZE = 65536
+
+class FileDigest(object):
+    """
+    A file being written by a poller, digested as the bytes arrive.
+
+    Attributes:
+        file (file or Artifact): The underlying file
+        name (str): The name of the underlying file
+        artifact (Artifact): The underlying file, if it is held by the
+            artifact store
+        sha1 (hash): The running SHA1 hash of the bytes written
+        size (int): The number of bytes written
+        prefix (bytes): The first bytes written, up to prefix_size
+        prefix_size (int): Maximum number of bytes kept in the prefix
+    """
+    def __init__(self, f, prefix_size=0):
+        self.file = f
+        self.name = f.name
+        self.artifact = f if isinstance(f, Artifact) else None
+        self.sha1 = hashlib.sha1()
+        self.size = 0
+        self.prefix = b''
+        self.prefix_size = prefix_size
+
+    def write(self, data):
+        """
+        Write bytes to the file, adding them to the digest.
+
+        Arguments:
+            data (bytes): The bytes to write
+        """
+        self.sha1.update(data)
+        self.size += len(data)
+        if len(self.prefix) < self.prefix_size:
+            self.prefix += data[:self.prefix_size - len(self.prefix)]
+        self.file.write(data)
+
+    def update_from_file(self):
+        """
+        Digest the contents of the file, for files written by something
+        other than this object.
+        """
+        with open(self.name, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                self.sha1.update(chunk)
+                self.size += len(chunk)
+                if len(self.prefix) < self.prefix_size:
+                    self.prefix += chunk[:self.prefix_size - len(self.prefix)]
+
+    def open_path(self):
+        """
+        Close the file and get a path on disk where another program can
+        write it.
+
+        Returns:
+            str: The path of the file
+        """
+        if self.artifact is not None:
+            self.name = self.artifact.open_path()
+        else:
+            self.file.close()
+        return self.name
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        """
+        Close and delete the file, for polls which failed to retrieve it.
+        """
+        if self.artifact is not None:
+            self.artifact.discard()
+        else:
+            self.file.close()
+            if os.path.exists(self.name):
+                os.remove(self.name)
+
+
+class FilePollResult(PollResult):
+    """
+    Wrapper for the results of polling a file-based service.
+
+    Attributes:
+        file_name (str): The file name of the saved file. None if there was
+            an error, or if the file was held by the artifact store and not
+            persisted.
+        artifact (Artifact): The file, while held by the artifact store
+        sha1 (str): The hex SHA1 hash of the file, computed as it was saved
+        size (int): The size of the file in bytes
+        prefix (str): The first bytes of the file, if the poller keeps them
+    """
+    def __init__(self, file_name, exception, digest=None):
+        super(FilePollResult, self).__init__(exception)
+        self.file_name = file_name
+        self.sha1 = None
+        self.size = None
+        self.prefix = None
+        self.artifact = None
+        if digest is not None:
+            self.artifact = digest.artifact
+            self.sha1 = digest.sha1.hexdigest()
+            self.size = digest.size
+            if digest.prefix_size > 0:
+                self.prefix = digest.prefix.decode('utf-8', errors='replace')
+
+    def read(self):
+        """
+        Read the contents of the file.
+
+        Returns:
+            bytes: The contents
+        """
+        if self.artifact is not None:
+            return self.artifact.read()
+        with open(self.file_name, 'rb') as f:
+            return f.read()
+
+    def serialize(self, obj):
+        class_str, args = super(FilePollResult, self).serialize(obj)
+        args = dict(args)
+        del args['artifact']
+        return [class_str, args]
+
 class FilePoller(Poller):
+    """
+    A poller which saves the files it retrieves.
+
+    Files are held by the artifact store if the engine has set one, which
+    decides whether to persist them once they are checked, and are saved to
+    the check files directory otherwise. Files are hashed while they are
+    written, so checkers never need to read them back to compare hashes.
+
+    Attributes:
+        prefix_size (int): Number of bytes from the start of each file kept
+            in its poll result
+        store (ArtifactStore): The store holding retrieved files, if any
+    """
+    prefix_size = 0
+    store = None
 
     def get_extension(self, path):
         """
@@ -35,10 +176,23 @@ class FilePoller(Poller):
             file: The created file
         """
         time = datetime.now().strftime('%d-%H:%M:%S')
-        while True:
-            rand = ''.join([random.choice(string.ascii_letters) for i in range(10)])
-            fname = '{}/{}.{}.{}'.format(REF_PAGES_DIR, time, rand, extension)
-            if not os.path.exists(fname):
-                break
+        fname = '{}/{}.{}.{}'.format(REF_PAGES_DIR, time, uuid.uuid4().hex[:10], extension)
         f = open(fname, 'wb')
         return f
+
+    def open_digest(self, extension):
+        """
+        Open a file in the artifact store, or like open_file if there is no
+        store, wrapped so it is digested as it is written.
+
+        Arguments:
+            extension (str): The file extension
+
+        Returns:
+            FileDigest: The created file
+        """
+        if self.store is not None:
+            f = self.store.open(extension)
+        else:
+            f = self.open_file(extension)
+        return FileDigest(f, self.prefix_size)
@@ -1,4 +1,3 @@
-import time, timeout_decorator
 from dns import resolver
 from dns.resolver import *
 from .poller import PollInput, PollResult, Poller
@@ -38,11 +37,12 @@ class DnsPoller(Poller):
     This Poller uses a DNS stub resolver to perform DNS queries against
     a server.
     """
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         res = resolver.Resolver()
         res.nameservers = [poll_input.server]
         res.port = poll_input.port
+        res.timeout = self.timeout
+        res.lifetime = self.timeout
     
         try:
             answer = res.query(poll_input.query, 
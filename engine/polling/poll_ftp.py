@@ -1,7 +1,6 @@
-import time, timeout_decorator
 import ftplib
 from .poller import PollInput, PollResult
-from .file_poller import FilePoller
+from .file_poller import FilePoller, FilePollResult
 
 class FtpPollInput(PollInput):
     """
@@ -14,7 +13,7 @@ class FtpPollInput(PollInput):
         super(FtpPollInput, self).__init__(server, port)
         self.filepath = filepath
 
-class FtpPollResult(PollResult):
+class FtpPollResult(FilePollResult):
     """
     Wrapper for the results of polling an FTP service.
 
@@ -23,9 +22,8 @@ class FtpPollResult(PollResult):
         exception (Exception): Exceptions raised in polling, if any. None
             if there was no error.
     """
-    def __init__(self, file_name, exception):
-        super(FtpPollResult, self).__init__(exception)
-        self.file_name = file_name
+    def __init__(self, file_name, exception, digest=None):
+        super(FtpPollResult, self).__init__(file_name, exception, digest)
 
 class FtpPoller(FilePoller):
     """
@@ -33,26 +31,25 @@ class FtpPoller(FilePoller):
 
     This poller uses passive FTP to retrieve files.
     """
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         username = poll_input.credentials.username
         password = poll_input.credentials.password
 
         extension = self.get_extension(poll_input.filepath)
-        f = self.open_file(extension)
+        f = self.open_digest(extension)
 
         ftp = ftplib.FTP()
         try:
-            ftp.connect(poll_input.server, poll_input.port)
+            ftp.connect(poll_input.server, poll_input.port, timeout=self.timeout)
             ftp.login(user=username, passwd=password)
             ftp.set_pasv(True)
             ftp.retrbinary('RETR {}'.format(poll_input.filepath), f.write)
             f.close()
             ftp.quit()
 
-            result = FtpPollResult(f.name, None)
+            result = FtpPollResult(f.name, None, f)
             return result
         except Exception as e:
-            f.close()
+            f.discard()
             result = FtpPollResult(None, e)
             return result
@@ -1,9 +1,9 @@
-import time, timeout_decorator
 import requests
 from requests.exceptions import *
 import re
 from .poller import PollInput, PollResult, Poller
-from .file_poller import FilePoller
+from .file_poller import FilePoller, FilePollResult
+from ..timeout import Deadline
 import urllib3
 from bs4 import BeautifulSoup
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -28,16 +28,15 @@ class HttpPollInput(PollInput):
         self.user_field = user_field
         self.pass_field = pass_field
 
-class HttpPollResult(PollResult):
+class HttpPollResult(FilePollResult):
     """
     Wrapper for the results of polling an HTTP service.
 
     Attributes:
         file_name (str): The file name of the saved HTTP response
     """
-    def __init__(self, file_name, exception):
-        super(HttpPollResult, self).__init__(exception)
-        self.file_name = file_name
+    def __init__(self, file_name, exception, digest=None):
+        super(HttpPollResult, self).__init__(file_name, exception, digest)
 
 class HttpPoller(FilePoller):
     """
@@ -45,8 +44,8 @@ class HttpPoller(FilePoller):
 
     This poller works with http and https, and it can log in to authenticated pages.
     """
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
+        deadline = Deadline(self.timeout)
         try:
             proto = poll_input.proto
             server = poll_input.server
@@ -60,7 +59,8 @@ class HttpPoller(FilePoller):
                 headers = {'Host': poll_input.host}
             
             session = requests.Session()
-            r = session.get(url, headers=headers, verify=False, allow_redirects=False)
+            r = session.get(url, headers=headers, verify=False, allow_redirects=False,
+                            timeout=deadline.remaining())
 #            while 'Location' in r.headers:
 #                url_parts = urllib3.util.parse_url(r.headers['Location'])
 #                suburl = ''
@@ -74,19 +74,19 @@ class HttpPoller(FilePoller):
             content = r.text
 
             if not poll_input.user_field is None:
-                content = perform_login(poll_input, session, headers, url, content)
+                content = perform_login(poll_input, session, headers, url, content, deadline)
 
-            f = self.open_file('html')
+            f = self.open_digest('html')
             f.write(content.encode('utf-8'))
             f.close()
 
-            result = HttpPollResult(f.name, None)
+            result = HttpPollResult(f.name, None, f)
             return result
         except Exception as e:
             result = HttpPollResult(None, e)
             return result
 
-def perform_login(poll_input, session, headers, url, content):
+def perform_login(poll_input, session, headers, url, content, deadline):
     """
     Log in to an HTTP site.
 
@@ -96,6 +96,7 @@ def perform_login(poll_input, session, headers, url, content):
         headers (Dict(str->str)): The HTTP headers
         url (str): The url of the login page
         content (str): The HTML content of the login page
+        deadline (Deadline): The deadline for the poll
     """
     username = poll_input.credentials.username
     password = poll_input.credentials.password
@@ -108,7 +109,8 @@ def perform_login(poll_input, session, headers, url, content):
             data[field['name']] = field['value']
 
     # Log in
-    r = session.post(url, data, headers=headers, allow_redirects=False)
+    r = session.post(url, data, headers=headers, allow_redirects=False,
+                     timeout=deadline.remaining())
     r.raise_for_status()
 
     # Follow redirects past the login page
@@ -119,7 +121,8 @@ def perform_login(poll_input, session, headers, url, content):
             suburl += url_parts.scheme + '://'
         suburl += poll_input.server
         suburl += url_parts.path
-        r = session.get(suburl, headers=headers, verify=False, allow_redirects=False)
+        r = session.get(suburl, headers=headers, verify=False, allow_redirects=False,
+                        timeout=deadline.remaining())
     r.raise_for_status()
 
     return r.text
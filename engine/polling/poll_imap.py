@@ -1,4 +1,3 @@
-import timeout_decorator
 from imaplib import IMAP4
 from .poller import PollInput, PollResult, Poller
 
@@ -28,13 +27,12 @@ class ImapPoller(Poller):
     """
     A poller for IMAP services.
     """
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         username = poll_input.credentials.username
         password = poll_input.credentials.password
         
         try:
-            imap = IMAP4(poll_input.server, poll_input.port)
+            imap = IMAP4(poll_input.server, poll_input.port, timeout=self.timeout)
             if poll_input.starttls:
                 imap.starttls()
             imap.login(username, password)
@@ -1,4 +1,3 @@
-import time, timeout_decorator
 import ldap
 
 from .poller import PollInput, PollResult, Poller
@@ -19,7 +18,6 @@ class LdapPollResult(PollResult):
 
 class LdapPoller(Poller):
 
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         username = poll_input.credentials.username
         password = poll_input.credentials.password
@@ -33,8 +31,11 @@ class LdapPoller(Poller):
         try:
             uri = 'ldap://%s:%d' % (poll_input.server, poll_input.port)
             con = ldap.initialize(uri)
+            con.set_option(ldap.OPT_NETWORK_TIMEOUT, self.timeout)
+            con.timeout = self.timeout
             con.simple_bind_s(dn, password)
-            output = con.search_st(base, scope, filt, attrs)
+            output = con.search_st(base, scope, filt, attrs,
+                                   timeout=self.timeout)
             output = output[0][1] # Only check first value
             
             result = LdapPollResult(output)
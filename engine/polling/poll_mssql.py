@@ -1,4 +1,3 @@
-import time, timeout_decorator
 import pymssql
 import socket
 
@@ -19,7 +18,6 @@ class MssqlPollResult(PollResult):
 
 class MssqlPoller(Poller):
 
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         username = poll_input.credentials.username
         password = poll_input.credentials.password
@@ -28,7 +26,9 @@ class MssqlPoller(Poller):
             user = username
             conn = pymssql.connect(poll_input.server,
                                    user,
-                                   password, poll_input.db)
+                                   password, poll_input.db,
+                                   timeout=self.timeout,
+                                   login_timeout=self.timeout)
             cursor = conn.cursor()
             cursor.execute(poll_input.query)
             output = ' '.join([str(row[0]) for row in cursor.fetchall()])
@@ -1,4 +1,3 @@
-import time, timeout_decorator
 import pymysql
 
 from .poller import PollInput, PollResult, Poller
@@ -18,7 +17,6 @@ class MysqlPollResult(PollResult):
 
 class MysqlPoller(Poller):
 
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         username = poll_input.credentials.username
         password = poll_input.credentials.password
@@ -26,7 +24,10 @@ class MysqlPoller(Poller):
         try:
             conn = pymysql.connect(host=poll_input.server, port=poll_input.port,
                                    user=username, password=password, 
-                                   database=poll_input.db)
+                                   database=poll_input.db,
+                                   connect_timeout=self.timeout,
+                                   read_timeout=self.timeout,
+                                   write_timeout=self.timeout)
             cursor = conn.cursor()
             cursor.execute(poll_input.query)
             output = cursor.fetchone()[0]
@@ -1,4 +1,3 @@
-import time, timeout_decorator
 import subprocess
 
 from .poller import PollInput, PollResult, Poller
@@ -15,10 +14,10 @@ class PingPollResult(PollResult):
         self.output = output
 
 class PingPoller(Poller):
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         server = poll_input.server
-        output = subprocess.call('ping -W 2 -c 5 -q {} > /dev/null'.format(server), shell=True)
+        output = subprocess.call('ping -W 2 -c 5 -q {} > /dev/null'.format(server), shell=True,
+                                 timeout=self.timeout)
         
         result = PingPollResult(output)
         return result
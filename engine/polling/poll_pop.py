@@ -1,4 +1,3 @@
-import time, timeout_decorator
 import poplib
 
 from .poller import PollInput, PollResult, Poller
@@ -16,7 +15,6 @@ class PopPollResult(PollResult):
         self.authenticated = authenticated
 
 class PopPoller(Poller):
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         username = poll_input.credentials.username
         password = poll_input.credentials.password
@@ -25,7 +23,7 @@ class PopPoller(Poller):
 #            username = '%s@%s' % (username, domain)
     
         try:
-            pop = poplib.POP3(poll_input.server, poll_input.port, 2)
+            pop = poplib.POP3(poll_input.server, poll_input.port, self.timeout)
 
             if poll_input.starttls:
                 pop.stls()
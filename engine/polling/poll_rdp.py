@@ -1,4 +1,3 @@
-import time, timeout_decorator
 import subprocess
 
 from .poller import PollInput, PollResult, Poller
@@ -16,7 +15,6 @@ class RdpPollResult(PollResult):
 
 class RdpPoller(Poller):
 
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         username = poll_input.credentials.username
         password = poll_input.credentials.password
@@ -28,7 +26,8 @@ class RdpPoller(Poller):
         cmd.append('{}:{}'.format(poll_input.server, poll_input.port))
 
         try:
-            output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+            output = subprocess.check_output(cmd, stderr=subprocess.STDOUT,
+                                             timeout=self.timeout)
             result = RdpPollResult(True)
             return result
         except Exception as e:
@@ -1,8 +1,7 @@
-import time, timeout_decorator
 import socket
 
 from .poller import PollInput, PollResult
-from .file_poller import FilePoller
+from .file_poller import FilePoller, FilePollResult
 import subprocess
 
 class SmbPollInput(PollInput):
@@ -13,15 +12,13 @@ class SmbPollInput(PollInput):
         self.sharename = sharename
         self.path = path
 
-class SmbPollResult(PollResult):
+class SmbPollResult(FilePollResult):
 
-    def __init__(self, file_name, exceptions=None):
-        super(SmbPollResult, self).__init__(exceptions)
-        self.file_name = file_name
+    def __init__(self, file_name, exceptions=None, digest=None):
+        super(SmbPollResult, self).__init__(file_name, exceptions, digest)
 
 class SmbPoller(FilePoller):
 
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         username = poll_input.credentials.username
         password = poll_input.credentials.password
@@ -30,16 +27,21 @@ class SmbPoller(FilePoller):
         share = '//{}/{}'.format(poll_input.server, poll_input.sharename)
 
         extension = self.get_extension(poll_input.path)
-        f = self.open_file(extension)
-        f.close()
-        cmd = 'get "{}" "{}"'.format(poll_input.path, f.name)
+        f = self.open_digest(extension)
+        path = f.open_path()
+        cmd = 'get "{}" "{}"'.format(poll_input.path, path)
         smbcli = ['smbclient', '-U', username, share, password, '-c', cmd]
         if not domain is None:
             smbcli.extend(['-W', domain.domain])
         try:
-            subprocess.check_output(smbcli, stderr=subprocess.STDOUT)
-            result = SmbPollResult(f.name)
+            subprocess.check_output(smbcli, stderr=subprocess.STDOUT,
+                                    timeout=self.timeout)
+            # smbclient writes the file itself, so digest it here while it
+            # is likely still in the page cache
+            f.update_from_file()
+            result = SmbPollResult(f.name, None, f)
             return result
         except Exception as e:
+            f.discard()
             result = SmbPollResult(None, e.output)
             return result
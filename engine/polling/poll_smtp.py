@@ -1,4 +1,3 @@
-import time, timeout_decorator
 from smtplib import *
 import socket
 import random
@@ -22,7 +21,6 @@ class SmtpPollResult(PollResult):
 
 
 class SmtpPoller(Poller):
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         from_user = random.choice(poll_input.users)
         to_user = random.choice(poll_input.users)
@@ -31,7 +29,7 @@ class SmtpPoller(Poller):
         message = poll_input.message
     
         try:
-            smtp = SMTP(poll_input.server, poll_input.port)
+            smtp = SMTP(poll_input.server, poll_input.port, timeout=self.timeout)
             smtp.sendmail(from_addr, to_addr, 'Subject: {}'.format(message))
             smtp.quit()
     
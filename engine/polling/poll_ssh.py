@@ -1,9 +1,9 @@
-import time, timeout_decorator
 from paramiko import client
 from paramiko.ssh_exception import *
 import socket
 
 from .poller import PollInput, PollResult, Poller
+from ..timeout import Deadline
 
 class SshPollInput(PollInput):
     """
@@ -39,7 +39,6 @@ class SshPoller(Poller):
     A Poller for the SSH service
     """
 
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         """
         Poll the SSH service.
@@ -52,6 +51,7 @@ class SshPoller(Poller):
         """
         username = poll_input.credentials.username
         password = poll_input.credentials.password
+        deadline = Deadline(self.timeout)
 
         try:
             # Set up the SSH client
@@ -60,11 +60,15 @@ class SshPoller(Poller):
             cli.set_missing_host_key_policy(client.AutoAddPolicy())
 
             # Attempt to connect
-            cli.connect(poll_input.server, poll_input.port, username, password)
+            cli.connect(poll_input.server, poll_input.port, username, password,
+                        timeout=deadline.remaining(),
+                        banner_timeout=deadline.remaining(),
+                        auth_timeout=deadline.remaining())
 
             if poll_input.task is not None:
                 # If there is a task to complete, execute it, and retrieve the output
-                stdin, stdout, stderr = cli.exec_command(poll_input.task)
+                stdin, stdout, stderr = cli.exec_command(poll_input.task,
+                                                     timeout=deadline.remaining())
                 out = stdout.read().decode('utf-8')
                 err = stderr.read().decode('utf-8')
                 output = (out, err)
@@ -1,5 +1,3 @@
-from ..timeout import timeout
-import time, timeout_decorator
 import copy
 
 class PollInput(object):
@@ -32,9 +30,43 @@ class PollInput(object):
             args['credentials'] = args['credentials'].id
         return [class_str, args]
 
+    def serialize_compact(self):
+        """
+        Serialize only the parts of this PollInput which vary between polls
+        of the same input-output pair, the team and the credentials.
+
+        Returns:
+            Dict(str->int): The IDs of the team and credentials, if any
+        """
+        args = {'team': self.team.id}
+        credentials = getattr(self, 'credentials', None)
+        if credentials is not None:
+            args['credentials'] = credentials.id
+        return args
+
     def __str__(self):
         return str(self.attrs())
 
+    def deserialize_compact(check_io, args, teams, credentials):
+        """
+        Rebuild a PollInput serialized with serialize_compact from the
+        input-output pair it was made from.
+
+        Arguments:
+            check_io (CheckIO): The input-output pair used in the poll
+            args (Dict(str->int)): The IDs of the team and credentials
+            teams (Dict(int->Team)): Mapping of team IDs to teams in the engine
+            credentials (Dict(int->Credential)): Mapping of credential IDs to
+                credentials in use by the engine
+
+        Returns:
+            PollInput: The deserialized PollInput
+        """
+        poll_input = check_io.make_poll_input(teams[args['team']])
+        if 'credentials' in args:
+            poll_input.credentials = credentials[args['credentials']]
+        return poll_input
+
     def deserialize(input_class, args, teams, credentials):
         """
         Deserialize a PollInput based on the given arguments.
@@ -42,8 +74,9 @@ class PollInput(object):
         Arguments:
             input_class (Class): The specific class of the PollInput
             args (Dict): The arguments needed for constructing the PollInput
-            teams (List(Team)): List of teams in the engine
-            credentials (List(Credential): List of credentials in use by the engine
+            teams (Dict(int->Team)): Mapping of team IDs to teams in the engine
+            credentials (Dict(int->Credential)): Mapping of credential IDs to
+                credentials in use by the engine
 
         Returns:
             PollInput: The deserialized PollInput
@@ -57,11 +90,11 @@ class PollInput(object):
         if 'team' in args:
             id = args['team']
             del args['team']
-            team = [t for t in teams if t.id == id][0]
+            team = teams[id]
         if 'credentials' in args:
             id = args['credentials']
             del args['credentials']
-            creds = [c for c in credentials if c.id == id][0]
+            creds = credentials[id]
 
         # Reconstruct the PollInput
         poll_input = input_class(**args)
@@ -103,9 +136,17 @@ class PollResult(object):
 class Poller(object):
     """
     A service poller which tests target services.
+
+    Pollers must finish within `timeout` seconds by passing it (or the time
+    left on a Deadline) to the sockets and client libraries they use. The
+    engine abandons any poll which overruns it.
+
+    Attributes:
+        timeout (int): Number of seconds a poll may take, set by the engine
+            from the polling timeout setting
     """
+    timeout = 20
 
-    @timeout_decorator.timeout(20, use_signals=False)
     def poll(self, poll_input):
         """
         Poll a service and return a PollResult.
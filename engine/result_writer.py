@@ -0,0 +1,289 @@
+"""
+This module contains the writer used to batch check results into multi-row
+inserts off of the polling threads.
+"""
+from .model import write_results
+from .spool import ResultSpool
+from .round_bitmap import RoundBitmap
+from concurrent.futures import ThreadPoolExecutor
+import concurrent.futures
+from threading import Thread, Lock
+import pymysql
+import queue
+import time
+
+# Marker queued to make the writer flush its current batch immediately
+FLUSH = object()
+
+# Errors which mean the database is unavailable rather than that the rows
+# are bad, so the rows are spooled to be written later
+UNAVAILABLE_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError,
+                      TimeoutError)
+
+class ResultWriter(object):
+    """
+    Queues check results and writes them to the database in batches on a
+    background thread.
+
+    A batch is written once it holds `batch_size` rows, once
+    `flush_interval` seconds have passed since its first row, or when a
+    flush is requested. The queue holds at most `max_pending` rows. Once it
+    is full, callers of put block until the writer catches up.
+
+    If the database is unavailable or a write takes longer than
+    `latency_threshold` seconds, the batch is appended to a local spool
+    instead, and so are all following batches until the database recovers.
+    A batch rejected for any other reason is written one row at a time, and
+    the rows the database rejects are dropped, since retrying them would
+    never succeed. Every `retry_interval` seconds the
+    writer tries to replay the spool, and it resumes writing directly once
+    the replay succeeds. The bitmaps of the finished rounds the replayed
+    rows belong to are then rebuilt, along with every later round since
+    their prefix sums depend on them.
+
+    Attributes:
+        batch_size (int): Maximum number of rows written per insert
+        flush_interval (float): Maximum seconds a row waits before a flush
+        latency_threshold (float): Seconds a write may take before spooling
+        retry_interval (float): Seconds between attempts to replay the spool
+        queue (Queue): Rows waiting to be written
+        spool (ResultSpool): The spool rows are held in while the database
+            is unavailable
+        sla (SlaTracker): The tracker SLA violations are recorded with, if any
+        stats (Dict(str->float)): Counters describing the writes so far
+        replayed_round (int): The earliest round of the rows replayed since
+            the bitmaps were last rebuilt, if any
+    """
+    def __init__(self, batch_size=500, flush_interval=1.0, max_pending=10000,
+                 spool_path='etc/results.spool', latency_threshold=5.0,
+                 retry_interval=10.0, sla=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.latency_threshold = latency_threshold
+        self.retry_interval = retry_interval
+        self.queue = queue.Queue(max_pending)
+        self.spool = ResultSpool(spool_path)
+        self.sla = sla
+        self.last_retry = None
+        self.replayed_round = None
+        # Writes run on their own threads so a stalled database can be
+        # abandoned after the latency threshold
+        self.db_executor = ThreadPoolExecutor(max_workers=4)
+        self.stats_lock = Lock()
+        self.stats = {
+            'flushes': 0,
+            'rows': 0,
+            'spooled_rows': 0,
+            'replayed_rows': 0,
+            'failed_rows': 0,
+            'last_latency': 0.0,
+            'max_latency': 0.0,
+            'total_latency': 0.0,
+        }
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def put(self, row):
+        """
+        Queue a result row to be written, blocking while the queue is full.
+
+        Arguments:
+            row (Tuple): The values of the row, in the order of RESULT_INSERT
+        """
+        self.queue.put(row)
+
+    def flush(self):
+        """
+        Write all queued rows, returning once they are in the database or
+        the spool.
+        """
+        self.queue.put(FLUSH)
+        self.queue.join()
+
+    def run(self):
+        """
+        Gather rows into batches and write them until the process exits.
+        """
+        while True:
+            batch = []
+            row = self.queue.get()
+            flush = row is FLUSH
+            if not flush:
+                batch.append(row)
+            deadline = time.monotonic() + self.flush_interval
+            while not flush and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is FLUSH:
+                    flush = True
+                else:
+                    batch.append(row)
+
+            try:
+                self.write(batch)
+            finally:
+                for i in range(len(batch) + int(flush)):
+                    self.queue.task_done()
+
+    def write(self, batch):
+        """
+        Write a batch of rows with a single multi-row insert, spooling it if
+        the database is unavailable.
+
+        Arguments:
+            batch (List(Tuple)): The rows to write
+        """
+        if self.spool.pending() and not self.replay():
+            if len(batch) > 0:
+                self.spool_batch(batch)
+            return
+        if len(batch) == 0:
+            return
+
+        start = time.monotonic()
+        try:
+            self.write_valid(batch)
+        except UNAVAILABLE_ERRORS as e:
+            print("Database write failed, spooling results: {}".format(str(e)))
+            self.last_retry = time.monotonic()
+            self.spool_batch(batch)
+            return
+        latency = time.monotonic() - start
+
+        with self.stats_lock:
+            self.stats['flushes'] += 1
+            self.stats['rows'] += len(batch)
+            self.stats['last_latency'] = latency
+            self.stats['max_latency'] = max(self.stats['max_latency'], latency)
+            self.stats['total_latency'] += latency
+
+    def write_valid(self, batch):
+        """
+        Write a batch of rows, dropping any the database rejects. If the
+        batch fails, it is written one row at a time. Only the errors in
+        UNAVAILABLE_ERRORS are raised, in which case the rows should be
+        retried later.
+
+        Arguments:
+            batch (List(Tuple)): The rows to write
+        """
+        try:
+            self.timed_write(batch)
+            return
+        except UNAVAILABLE_ERRORS:
+            raise
+        except Exception as e:
+            if len(batch) == 1:
+                print("Dropping result rejected by the database: {}".format(str(e)))
+                with self.stats_lock:
+                    self.stats['failed_rows'] += 1
+                return
+            print("Batch rejected, writing rows individually: {}".format(str(e)))
+        for row in batch:
+            self.write_valid([row])
+
+    def timed_write(self, batch):
+        """
+        Insert a batch of rows along with the latest result for each team
+        and check, giving up once the latency threshold passes.
+        An abandoned insert may still complete later, which is harmless
+        since result inserts are idempotent.
+
+        Arguments:
+            batch (List(Tuple)): The rows to write
+        """
+        future = self.db_executor.submit(write_results, batch, self.sla)
+        try:
+            future.result(timeout=self.latency_threshold)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError('Write took over {}s'.format(self.latency_threshold))
+
+    def spool_batch(self, batch):
+        """
+        Append a batch of rows to the spool.
+
+        Arguments:
+            batch (List(Tuple)): The rows to spool
+        """
+        try:
+            self.spool.append(batch)
+        except Exception as e:
+            print("Failed to spool {} results: {}".format(len(batch), str(e)))
+            with self.stats_lock:
+                self.stats['failed_rows'] += len(batch)
+            return
+        with self.stats_lock:
+            self.stats['spooled_rows'] += len(batch)
+
+    def replay(self):
+        """
+        Try to replay the spool if the retry interval has passed.
+
+        Returns:
+            bool: Whether the spool was fully replayed
+        """
+        now = time.monotonic()
+        if self.last_retry is not None and now - self.last_retry < self.retry_interval:
+            return False
+        self.last_retry = now
+        try:
+            count = self.spool.replay(self.replay_write, self.batch_size)
+        except Exception as e:
+            print("Database still unavailable: {}".format(str(e)))
+            return False
+        print("Replayed {} spooled results".format(count))
+        with self.stats_lock:
+            self.stats['replayed_rows'] += count
+        self.rebuild_bitmaps()
+        return True
+
+    def replay_write(self, batch):
+        """
+        Write a batch of replayed rows, noting the earliest round they
+        belong to.
+
+        Arguments:
+            batch (List(Tuple)): The rows to write
+        """
+        self.write_valid(batch)
+        first_round = min([row[3] for row in batch])
+        if self.replayed_round is None or first_round < self.replayed_round:
+            self.replayed_round = first_round
+
+    def rebuild_bitmaps(self):
+        """
+        Rebuild the bitmaps of the finished rounds changed by replayed rows,
+        which were built before those rows reached the database.
+        """
+        if self.replayed_round is None:
+            return
+        try:
+            count = RoundBitmap.rebuild(self.replayed_round)
+        except Exception as e:
+            print("Failed to rebuild bitmaps from round {}: {}".format(
+                self.replayed_round, str(e)))
+            return
+        print("Rebuilt {} round bitmaps from round {}".format(count, self.replayed_round))
+        self.replayed_round = None
+
+    def get_stats(self):
+        """
+        Get a snapshot of the writer's statistics.
+
+        Returns:
+            Dict(str->float): The statistics, including the number of rows
+                pending and the average flush latency
+        """
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats['pending'] = self.queue.qsize()
+        if stats['flushes'] > 0:
+            stats['avg_latency'] = stats['total_latency'] / stats['flushes']
+        else:
+            stats['avg_latency'] = 0.0
+        return stats
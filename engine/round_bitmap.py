@@ -0,0 +1,212 @@
+"""
+This module contains the per-round bitmaps of check results used to
+compute uptime without reading individual results.
+"""
+import db
+import numpy as np
+
+COLUMNS = ['check_round', 'time', 'team_ids', 'check_ids', 'passed',
+           'up_prefix', 'count_prefix']
+
+BITMAP_UPSERT = ("INSERT INTO round_bitmap (check_round, time, team_ids, "
+                 "check_ids, passed, up_prefix, count_prefix) "
+                 "VALUES (%s, %s, %s, %s, %s, %s, %s) "
+                 "ON DUPLICATE KEY UPDATE time=VALUES(time), "
+                 "team_ids=VALUES(team_ids), check_ids=VALUES(check_ids), "
+                 "passed=VALUES(passed), "
+                 "up_prefix=VALUES(up_prefix), "
+                 "count_prefix=VALUES(count_prefix)")
+
+def join_ids(ids):
+    """
+    Encode a list of IDs as a comma-separated string.
+    """
+    return ','.join([str(i) for i in ids])
+
+def split_ids(ids):
+    """
+    Decode a comma-separated string of IDs.
+    """
+    return [int(i) for i in ids.split(',') if i != '']
+
+class RoundBitmap(object):
+    """
+    The outcome of every check for every team in a round, along with the
+    totals of all rounds up to and including it.
+
+    Each round is stored as a bit matrix of teams by checks, with teams and
+    checks in ID order. Alongside it are two prefix sums, the number of
+    passed checks and the number of checks polled for each team and check
+    over every round so far. The uptime over a range of rounds is then the
+    difference of the prefix sums at either end of the range, so it takes
+    two rows to compute no matter how many rounds the range covers.
+
+    Attributes:
+        check_round (int): The check round
+        time (datetime): When the round started
+        team_ids (List(int)): The team ID of each row of the matrix
+        check_ids (List(int)): The check ID of each column of the matrix
+        passed (ndarray): Whether each check passed in this round
+        up_prefix (ndarray): Number of passed checks up to this round
+        count_prefix (ndarray): Number of checks polled up to this round
+    """
+    def __init__(self, check_round, time, team_ids, check_ids, passed,
+                 up_prefix, count_prefix):
+        self.check_round = check_round
+        self.time = time
+        self.team_ids = team_ids
+        self.check_ids = check_ids
+        self.passed = passed
+        self.up_prefix = up_prefix
+        self.count_prefix = count_prefix
+
+    @staticmethod
+    def from_row(row):
+        """
+        Decode a row of the round_bitmap table.
+
+        Arguments:
+            row (List(object)): The row, in the order of COLUMNS
+
+        Returns:
+            RoundBitmap: The bitmap
+        """
+        check_round, time, team_ids, check_ids, passed, up_prefix, count_prefix = row
+        team_ids = split_ids(team_ids)
+        check_ids = split_ids(check_ids)
+        shape = (len(team_ids), len(check_ids))
+        passed = np.unpackbits(np.frombuffer(passed, dtype=np.uint8),
+                               count=shape[0] * shape[1]).reshape(shape)
+        up_prefix = np.frombuffer(up_prefix, dtype=np.int32).reshape(shape)
+        count_prefix = np.frombuffer(count_prefix, dtype=np.int32).reshape(shape)
+        return RoundBitmap(check_round, time, team_ids, check_ids,
+                           passed.astype(bool), up_prefix, count_prefix)
+
+    @staticmethod
+    def load(where=None, args=None, orderby='check_round DESC'):
+        """
+        Load the first bitmap matching the given criteria.
+
+        Arguments:
+            where (str): Optional, MySQL WHERE statement
+            args (Tuple(str)): Optional, arguments for a prepared statement
+            orderby (str): Optional, MySQL ORDER BY statement
+
+        Returns:
+            RoundBitmap: The bitmap, or None if there is no match
+        """
+        rows = db.get('round_bitmap', COLUMNS, where=where, orderby=orderby,
+                      args=args, limit=1)
+        if len(rows) == 0:
+            return None
+        return RoundBitmap.from_row(rows[0])
+
+    @staticmethod
+    def build(check_round):
+        """
+        Build and store the bitmap of a finished round from its results.
+
+        Arguments:
+            check_round (int): The check round
+
+        Returns:
+            RoundBitmap: The bitmap
+        """
+        team_ids = [team_id for team_id, in db.get('team', ['id'], orderby='id ASC')]
+        check_ids = [check_id for check_id, in db.get('service_check', ['id'], orderby='id ASC')]
+        team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+        check_index = {check_id: i for i, check_id in enumerate(check_ids)}
+        shape = (len(team_ids), len(check_ids))
+
+        passed = np.zeros(shape, dtype=bool)
+        polled = np.zeros(shape, dtype=bool)
+        rows = db.get('result', ['team_id', 'check_id', 'result'],
+                      where='check_round=%s', args=(check_round,))
+        for team_id, check_id, result in rows:
+            if team_id in team_index and check_id in check_index:
+                cell = (team_index[team_id], check_index[check_id])
+                polled[cell] = True
+                passed[cell] = bool(result)
+
+        # Continue the prefix sums of the previous round, unless the teams
+        # or checks have changed since
+        up_prefix = passed.astype(np.int32)
+        count_prefix = polled.astype(np.int32)
+        previous = RoundBitmap.load(where='check_round < %s', args=(check_round,))
+        if previous is not None and previous.team_ids == team_ids and \
+                previous.check_ids == check_ids:
+            up_prefix += previous.up_prefix
+            count_prefix += previous.count_prefix
+
+        time = db.get('check_log', ['time'], where='check_round=%s',
+                      args=(check_round,))[0][0]
+        db.execute(BITMAP_UPSERT, (check_round, time, join_ids(team_ids),
+                                   join_ids(check_ids),
+                                   np.packbits(passed).tobytes(),
+                                   up_prefix.tobytes(),
+                                   count_prefix.tobytes()))
+        return RoundBitmap(check_round, time, team_ids, check_ids, passed,
+                           up_prefix, count_prefix)
+
+    @staticmethod
+    def rebuild(first_round):
+        """
+        Rebuild the bitmaps of every finished round from the given round on,
+        such as after results of those rounds were written late.
+
+        Arguments:
+            first_round (int): The first check round to rebuild
+
+        Returns:
+            int: The number of bitmaps rebuilt
+        """
+        rows = db.get('check_log', ['check_round'],
+                      where='check_round >= %s AND end_time IS NOT NULL',
+                      orderby='check_round ASC', args=(first_round,))
+        for check_round, in rows:
+            RoundBitmap.build(check_round)
+        return len(rows)
+
+    @staticmethod
+    def uptime(start=None, end=None):
+        """
+        Compute the uptime of every team and check over a time range.
+
+        Arguments:
+            start (datetime): Optional, only count rounds started at or after this time
+            end (datetime): Optional, only count rounds started at or before this time
+
+        Returns:
+            Dict(int->Dict(int->float)): Mapping of team IDs to check IDs to
+                the fraction of polls which passed, with None for checks
+                which were never polled
+        """
+        if end is None:
+            last = RoundBitmap.load()
+        else:
+            last = RoundBitmap.load(where='time <= %s', args=(end,),
+                                    orderby='time DESC')
+        if last is None:
+            return {}
+
+        up = last.up_prefix
+        count = last.count_prefix
+        if start is not None:
+            first = RoundBitmap.load(where='time < %s', args=(start,),
+                                     orderby='time DESC')
+            if first is not None and first.team_ids == last.team_ids and \
+                    first.check_ids == last.check_ids:
+                up = up - first.up_prefix
+                count = count - first.count_prefix
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = up / count
+        uptime = {}
+        for i, team_id in enumerate(last.team_ids):
+            uptime[team_id] = {}
+            for j, check_id in enumerate(last.check_ids):
+                if count[i, j] > 0:
+                    uptime[team_id][check_id] = float(ratios[i, j])
+                else:
+                    uptime[team_id][check_id] = None
+        return uptime
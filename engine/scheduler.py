@@ -0,0 +1,265 @@
+"""
+This module contains the scheduler used to run all of the polls of a check
+round on a single event loop.
+"""
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from .polling.poller import PollResult
+
+# Seconds a poll may overrun its timeout before the engine abandons it
+TIMEOUT_GRACE = 5
+
+# Threads added to the pool for abandoned polls, which keep running until
+# their poller returns
+ABANDONED_RESERVE = 32
+
+# Dispatch modes for spreading the polls of a round across its window
+DISPATCH_BURST = 'burst'
+DISPATCH_EVEN = 'even'
+DISPATCH_RANDOM = 'random'
+
+class RoundScheduler(object):
+    """
+    Runs every (check, team) poll of a round as a task on one event loop.
+
+    Pollers are blocking, so each poll is handed to a bounded thread pool,
+    and a semaphore caps the number of polls in flight across the whole
+    round. A poll which has not returned shortly after its timeout is
+    abandoned and recorded as timed out. Its thread stays busy until the
+    poller returns, so the pool has `ABANDONED_RESERVE` threads beyond
+    `workers` to absorb them. Abandoned polls still running are tracked and
+    reported after each round.
+
+    Polls can be fired all at once (burst) or spread across a dispatch
+    window. When spread, each check gets its own slot of the window and the
+    teams are spaced evenly within it, so every team's service is sampled at
+    nearly the same point in the round. The even mode keeps the slots in a
+    fixed order, while the random mode shuffles them every round.
+
+    Attributes:
+        concurrency (int): Maximum number of polls in flight at once
+        workers (int): Number of threads used to run blocking pollers
+        timeout (int): Number of seconds a poll may take
+        dispatch (str): The dispatch mode (burst, even or random)
+        writer (ResultWriter): The writer results are queued with, if any
+        executor (ThreadPoolExecutor): The pool the pollers are run in
+        abandoned (Set(Future)): Abandoned polls which are still running
+    """
+    def __init__(self, concurrency, workers, timeout, dispatch=DISPATCH_BURST,
+                 writer=None):
+        self.writer = writer
+        self.concurrency = None
+        self.workers = None
+        self.executor = None
+        self.abandoned = set()
+        self.configure(concurrency, workers, timeout, dispatch)
+
+    def configure(self, concurrency, workers, timeout, dispatch=DISPATCH_BURST):
+        """
+        Update the concurrency limits, timeout and dispatch mode, replacing
+        the thread pool if its size changed. Should only be called between
+        rounds. Polls in flight are capped at the number of workers, since a
+        poll waiting for a thread would spend its timeout in the queue.
+
+        Arguments:
+            concurrency (int): Maximum number of polls in flight at once
+            workers (int): Number of threads used to run blocking pollers
+            timeout (int): Number of seconds a poll may take
+            dispatch (str): The dispatch mode (burst, even or random)
+        """
+        if dispatch not in (DISPATCH_BURST, DISPATCH_EVEN, DISPATCH_RANDOM):
+            raise Exception('Unknown dispatch mode: {}'.format(dispatch))
+        workers = max(1, workers)
+        self.concurrency = max(1, min(concurrency, workers))
+        self.timeout = timeout
+        self.dispatch = dispatch
+        if workers != self.workers:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+            self.workers = workers
+            self.executor = ThreadPoolExecutor(
+                    max_workers=self.workers + ABANDONED_RESERVE)
+
+    def run_round(self, check_round, polls, window=0):
+        """
+        Run all of the polls of a round, returning once every poll has
+        finished and its result has been stored or queued with the writer.
+
+        Arguments:
+            check_round (int): The check round
+            polls (List(Check, CheckIO, PollInput)): The polls to run
+            window (float): Number of seconds to spread the polls across
+
+        Returns:
+            int: The number of polls abandoned at the timeout
+        """
+        return asyncio.run(self.schedule(check_round, polls, window))
+
+    def dispatch_offsets(self, polls, window):
+        """
+        Determine how long after the start of the round each poll should be
+        dispatched.
+
+        Arguments:
+            polls (List(Check, CheckIO, PollInput)): The polls to run
+            window (float): Number of seconds to spread the polls across
+
+        Returns:
+            List(float): The dispatch offset of each poll, in seconds
+        """
+        offsets = [0] * len(polls)
+        if self.dispatch == DISPATCH_BURST or window <= 0 or len(polls) == 0:
+            return offsets
+
+        # Group the polls by check so each check gets one slot of the window
+        check_polls = {}
+        for i, (check, check_io, poll_input) in enumerate(polls):
+            if check.id not in check_polls:
+                check_polls[check.id] = []
+            check_polls[check.id].append(i)
+
+        check_ids = sorted(check_polls.keys())
+        if self.dispatch == DISPATCH_RANDOM:
+            random.shuffle(check_ids)
+
+        # Space the teams evenly within each check's slot
+        slot = window / len(check_ids)
+        for n, check_id in enumerate(check_ids):
+            indices = sorted(check_polls[check_id],
+                             key=lambda i: polls[i][2].team.id)
+            step = slot / len(indices)
+            for k, i in enumerate(indices):
+                offsets[i] = n * slot + k * step
+        return offsets
+
+    async def schedule(self, check_round, polls, window=0):
+        """
+        Create a task for each poll of the round and wait for all of them.
+
+        Arguments:
+            check_round (int): The check round
+            polls (List(Check, CheckIO, PollInput)): The polls to run
+            window (float): Number of seconds to spread the polls across
+
+        Returns:
+            int: The number of polls abandoned at the timeout
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        offsets = self.dispatch_offsets(polls, window)
+        tasks = []
+        batches = {}
+        for (check, check_io, poll_input), offset in zip(polls, offsets):
+            if check.batched:
+                # Checked together once every team's poll has finished
+                key = (check.id, check_io.id)
+                if key not in batches:
+                    batches[key] = (check, check_io, [], [])
+                batch = batches[key]
+                task = self.run_poll(loop, semaphore, check_round, check,
+                                     check_io, poll_input, offset, batch[3])
+                batch[2].append(task)
+            else:
+                task = self.run_poll(loop, semaphore, check_round,
+                                     check, check_io, poll_input, offset)
+                tasks.append(task)
+        for check, check_io, poll_tasks, results in batches.values():
+            tasks.append(self.run_batch(loop, check_round, check, check_io,
+                                        poll_tasks, results))
+        timeouts = 0
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                print("Poll failed: {}".format(str(outcome)))
+            else:
+                timeouts += outcome
+
+        abandoned = len(self.abandoned)
+        if abandoned > ABANDONED_RESERVE:
+            print("{} abandoned polls still running, holding {} of {} "
+                  "workers".format(abandoned, abandoned - ABANDONED_RESERVE,
+                                   self.workers))
+        elif abandoned > 0:
+            print("{} abandoned polls still running".format(abandoned))
+        return timeouts
+
+    async def run_batch(self, loop, check_round, check, check_io, poll_tasks,
+                        results):
+        """
+        Wait for every poll of a batched check, then check and store all of
+        their results at once.
+
+        Arguments:
+            loop (AbstractEventLoop): The running event loop
+            check_round (int): The check round
+            check (Check): The check being run
+            check_io (CheckIO): The input-output pair used in the check
+            poll_tasks (List(Coroutine)): The polls of the check
+            results (List(PollInput, PollResult, float)): The list the
+                polls add their results to
+
+        Returns:
+            int: The number of polls abandoned at the timeout
+        """
+        timeouts = 0
+        outcomes = await asyncio.gather(*poll_tasks, return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                print("Poll failed: {}".format(str(outcome)))
+            elif outcome:
+                timeouts += 1
+        if len(results) > 0:
+            await loop.run_in_executor(self.executor, check.check_batch,
+                                       check_round, check_io.id, results,
+                                       check_io.expected, self.writer)
+        return timeouts
+
+    async def run_poll(self, loop, semaphore, check_round, check, check_io,
+                       poll_input, offset=0, batch=None):
+        """
+        Wait for the poll's dispatch offset, run it in the thread pool once a
+        slot is available, then check and store its result. For batched
+        checks, the result is added to the batch instead.
+
+        Arguments:
+            loop (AbstractEventLoop): The running event loop
+            semaphore (Semaphore): The semaphore limiting polls in flight
+            check_round (int): The check round
+            check (Check): The check being run
+            check_io (CheckIO): The input-output pair used in the check
+            poll_input (PollInput): The team-specific input to the poller
+            offset (float): Seconds after the start of the round to dispatch
+            batch (List(PollInput, PollResult, float)): Optional, the list
+                to add the result to rather than checking it
+
+        Returns:
+            bool: Whether the poll was abandoned at the timeout
+        """
+        if offset > 0:
+            await asyncio.sleep(offset)
+        timed_out = False
+        async with semaphore:
+            start = loop.time()
+            poll = self.executor.submit(check.timed_poll, poll_input)
+            try:
+                poll_result, latency = await asyncio.wait_for(
+                        asyncio.wrap_future(poll), self.timeout + TIMEOUT_GRACE)
+            except asyncio.TimeoutError:
+                timed_out = True
+                # A poll still queued for a thread is cancelled so it never
+                # starts, and only one already running is abandoned
+                if not poll.cancel() and not poll.done():
+                    self.abandoned.add(poll)
+                    poll.add_done_callback(self.abandoned.discard)
+                latency = loop.time() - start
+                poll_result = PollResult(TimeoutError(
+                        'Poll exceeded {} second timeout'.format(self.timeout)))
+            if batch is not None:
+                batch.append((poll_input, poll_result, latency))
+            else:
+                await loop.run_in_executor(self.executor, check.check_single,
+                                           check_round, check_io.id, poll_input,
+                                           poll_result, check_io.expected,
+                                           self.writer, latency)
+        return timed_out
@@ -0,0 +1,120 @@
+"""
+This module contains the tracker used to detect SLA violations as check
+results are written.
+"""
+from threading import Lock
+import db
+
+STATE_UPSERT = ("INSERT INTO sla_state (team_id, check_id, check_round, "
+                "down_count) VALUES (%s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE "
+                "down_count=IF(VALUES(check_round) >= check_round, "
+                "VALUES(down_count), down_count), "
+                "check_round=GREATEST(check_round, VALUES(check_round))")
+
+VIOLATION_INSERT = ("INSERT INTO sla_violation (team_id, check_id, "
+                    "check_round, time) VALUES (%s, %s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE id=id")
+
+class SlaTracker(object):
+    """
+    Tracks the run of consecutive failed results for each team and check.
+
+    A team violates its SLA for a check once the check fails `threshold`
+    rounds in a row, after which the run starts over. The tracker is fed
+    every batch of results before it is written. The violations it finds
+    and the updated runs are written in the same transaction as the
+    results, and the runs are only kept in memory once that transaction
+    commits. The runs are loaded back from sla_state on startup, so the
+    tracker picks up where it left off after a restart.
+
+    Results for rounds a run has already counted are ignored, so replaying
+    results which were already written has no effect.
+
+    Attributes:
+        threshold (int): Number of consecutive failures which is a violation
+        runs (Dict((int, int)->(int, int))): Mapping of each team and check
+            to the last round counted and the number of failures in a row
+    """
+    def __init__(self, threshold=6):
+        self.threshold = threshold
+        self.runs = {}
+        self.lock = Lock()
+
+    def load(self):
+        """
+        Load the failure runs from the database.
+        """
+        rows = db.get('sla_state', ['team_id', 'check_id', 'check_round',
+                                    'down_count'])
+        with self.lock:
+            self.runs = {}
+            for team_id, check_id, check_round, down_count in rows:
+                self.runs[(team_id, check_id)] = (check_round, down_count)
+
+    def evaluate(self, rows):
+        """
+        Count a batch of results against the failure runs, without changing
+        the tracker.
+
+        Arguments:
+            rows (List(Tuple)): The values of each result row, in the order
+                of RESULT_INSERT
+
+        Returns:
+            Dict((int, int)->(int, int)): The updated runs
+            List(Tuple): The values of each new violation, in the order of
+                VIOLATION_INSERT
+        """
+        with self.lock:
+            runs = {}
+            for row in rows:
+                key = (row[2], row[0])
+                if key not in runs and key in self.runs:
+                    runs[key] = self.runs[key]
+
+        violations = []
+        for row in sorted(rows, key=lambda r: r[3]):
+            check_id, team_id, check_round, time, result = \
+                    row[0], row[2], row[3], row[4], row[7]
+            key = (team_id, check_id)
+            last_round, down_count = runs.get(key, (0, 0))
+            if check_round <= last_round:
+                continue
+            if result:
+                down_count = 0
+            else:
+                down_count += 1
+            if down_count >= self.threshold:
+                down_count = 0
+                violations.append((team_id, check_id, check_round, time))
+            runs[key] = (check_round, down_count)
+        return runs, violations
+
+    def commands(self, runs, violations):
+        """
+        Build the commands which record the updated runs and violations.
+
+        Arguments:
+            runs (Dict((int, int)->(int, int))): The updated runs
+            violations (List(Tuple)): The new violations
+
+        Returns:
+            List(Tuple(str, List(Tuple))): Each command and its arguments
+        """
+        states = [(team_id, check_id, check_round, down_count)
+                  for (team_id, check_id), (check_round, down_count)
+                  in runs.items()]
+        return [(STATE_UPSERT, states), (VIOLATION_INSERT, violations)]
+
+    def commit(self, runs):
+        """
+        Keep the updated runs once they have been written.
+
+        Arguments:
+            runs (Dict((int, int)->(int, int))): The updated runs
+        """
+        with self.lock:
+            for key, run in runs.items():
+                if key not in self.runs or run[0] >= self.runs[key][0]:
+                    self.runs[key] = run
@@ -0,0 +1,97 @@
+"""
+This module contains the local spool used to hold check results while the
+database is slow or unavailable.
+"""
+import json
+import os
+
+class ResultSpool(object):
+    """
+    An append-only file of result rows waiting to be written to the
+    database.
+
+    Each line of the spool is one row encoded as a JSON list. To replay the
+    spool, the file is first renamed so that new rows can keep being
+    appended while the old ones are written. The replay file is only
+    removed once every row in it has been written. Result inserts are
+    idempotent on (check_round, check_id, team_id), so a replay which is
+    interrupted can safely be repeated.
+
+    Attributes:
+        path (str): Path of the spool file
+        replay_path (str): Path the spool file is moved to while replaying
+    """
+    def __init__(self, path):
+        self.path = path
+        self.replay_path = path + '.replay'
+        spool_dir = os.path.dirname(path)
+        if spool_dir != '' and not os.path.exists(spool_dir):
+            os.makedirs(spool_dir)
+
+    def pending(self):
+        """
+        Check whether the spool holds any rows.
+
+        Returns:
+            bool: Whether there are rows waiting to be replayed
+        """
+        return os.path.exists(self.path) or os.path.exists(self.replay_path)
+
+    def append(self, rows):
+        """
+        Durably append rows to the spool.
+
+        Arguments:
+            rows (List(Tuple)): The rows to append
+        """
+        with open(self.path, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str))
+                f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, path):
+        """
+        Read the rows of a spool file, skipping a line left incomplete by a
+        crash.
+
+        Arguments:
+            path (str): The spool file to read
+
+        Returns:
+            List(List): The rows in the file
+        """
+        rows = []
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    print("Skipping corrupt spool line: {}".format(line))
+        return rows
+
+    def replay(self, write, batch_size):
+        """
+        Write every spooled row using the given function, removing the rows
+        from the spool once they are written.
+
+        Arguments:
+            write ((List(Tuple)) -> None): Function which writes a batch of
+                rows to the database, skipping rows the database rejects and
+                raising an exception if it is unavailable
+            batch_size (int): Number of rows to write at a time
+
+        Returns:
+            int: The number of rows replayed
+        """
+        count = 0
+        while self.pending():
+            if not os.path.exists(self.replay_path):
+                os.rename(self.path, self.replay_path)
+            rows = self.read(self.replay_path)
+            for i in range(0, len(rows), batch_size):
+                write(rows[i:i+batch_size])
+            os.remove(self.replay_path)
+            count += len(rows)
+        return count
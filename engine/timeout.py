@@ -1,30 +1,29 @@
-# Courtesy of stackoverflow
-from functools import wraps
 import errno
 import os
-import signal
+import time
 
-def timeout(seconds, error_message=os.strerror(errno.ETIME)):
+class Deadline(object):
     """
-    A decorator which causes the function it is applied to to timeout after the given number of seconds.
+    A point in time by which a poll must be finished.
 
-    Arguments:
-        seconds (int): The number of seconds before the function times out
-        error_message (str): The message to use in the error message
-    """
-    def decorator(func):
-        def _handle_timeout(signum, frame):
-            raise TimeoutError(error_message)
+    Pollers use this to split their timeout across the steps of a poll,
+    handing the time remaining to each socket or client library call rather
+    than running the poll in a separate process.
 
-        def wrapper(*args, **kwargs):
-            signal.signal(signal.SIGALRM, _handle_timeout)
-            signal.alarm(seconds)
-            try:
-                result = func(*args, **kwargs)
-            finally:
-                signal.alarm(0)
-            return result
+    Attributes:
+        expires (float): The monotonic time at which the deadline passes
+    """
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
 
-        return wraps(func)(wrapper)
+    def remaining(self):
+        """
+        Get the number of seconds left before the deadline.
 
-    return decorator
+        Returns:
+            float: Seconds remaining, raising TimeoutError if there are none
+        """
+        remaining = self.expires - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(os.strerror(errno.ETIME))
+        return remaining
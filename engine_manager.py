@@ -1,28 +1,67 @@
 #!/usr/bin/python3
 from engine.engine import ScoringEngine
-from engine.file_manager import FileManager
+from engine.coordinator import Coordinator
+from engine.compactor import ResultCompactor
+import argparse
 import db
-import sys
 from threading import Thread
 
+def parse_shard(value):
+    """
+    Parse a shard given in the form i/n.
+
+    Arguments:
+        value (str): The shard argument
+
+    Returns:
+        (int, int): The shard number and the number of shards
+    """
+    try:
+        index, count = [int(part) for part in value.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('Shard must be of the form i/n')
+    if count < 1 or index < 1 or index > count:
+        raise argparse.ArgumentTypeError('Shard must satisfy 1 <= i <= n')
+    return index, count
+
+def start_compactor():
+    compactor = ResultCompactor()
+    compactor_thread = Thread(target=compactor.compact_results)
+    compactor_thread.start()
+
 if __name__ == '__main__':
-    if len(sys.argv) > 3:
-        print("Usage: ./engine [start|stop] [team_number]")
-    if len(sys.argv) == 2:
-        engine = ScoringEngine()
-    if len(sys.argv) == 3:
-        team_num = int(sys.argv[2]) - 1
-        engine = ScoringEngine(team_num)
-    
-    if sys.argv[1] == 'start':
-        file_manager = FileManager()
-        file_manager_thread = Thread(target=file_manager.manage_files)
-        file_manager_thread.start()
+    parser = argparse.ArgumentParser(description='Start or stop the Scoring Engine.')
+    parser.add_argument('action', choices=['start', 'stop', 'coordinate'])
+    parser.add_argument('team_number', nargs='?', type=int,
+                        help='Only poll the given team number')
+    parser.add_argument('--shard', type=parse_shard,
+                        help='Run as shard i of n, polling every nth team')
+    parser.add_argument('--teams',
+                        help='Run as a shard polling the given comma-separated team IDs')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Number of local shards to start when coordinating')
+    args = parser.parse_args()
 
-        db.modify('settings', set='value=%s', where='skey=%s', args=(True, 'running'))
+    if args.action == 'start':
+        if args.shard is not None or args.teams is not None:
+            team_ids = None
+            if args.teams is not None:
+                team_ids = [int(tid) for tid in args.teams.split(',')]
+            engine = ScoringEngine(shard=args.shard, team_ids=team_ids)
+        else:
+            team_num = None
+            if args.team_number is not None:
+                team_num = args.team_number - 1
+            engine = ScoringEngine(team_num)
+
+            # The compactor stops once running is unset, so set it first
+            db.modify('settings', set='value=%s', where='skey=%s', args=(True, 'running'))
+            start_compactor()
         engine.start()
-    elif sys.argv[1] == 'stop':
+    elif args.action == 'coordinate':
+        coordinator = Coordinator(args.workers)
+        db.modify('settings', set='value=%s', where='skey=%s', args=(True, 'running'))
+        start_compactor()
+        coordinator.start()
+    elif args.action == 'stop':
         db.modify('settings', set='value=%s', where='skey=%s', args=(False, 'running'))
-    else:
-        print("Usage: ./engine [start|stop] [team_number]")
-
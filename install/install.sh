@@ -51,7 +51,7 @@ echo -e "\n$plus Installing dependencies..."
     install_package libldap2-dev
     install_package freerdp2-x11
     install_package smbclient
-    pip3 install -U dnspython paramiko pymysql pymssql pyldap requests timeout-decorator bs4
+    pip3 install -U dnspython paramiko pymysql pymssql pyldap requests bs4 numpy
     echo -e "$plus Common files installed"
 
 echo -e "$plus Installing database (mysql-server)..."
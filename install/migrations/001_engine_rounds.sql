@@ -0,0 +1,15 @@
+-- Round accounting, engine shards and idempotent result inserts
+ALTER TABLE `check_log`
+    ADD COLUMN `end_time` TIMESTAMP NULL,
+    ADD COLUMN `num_polls` INT NOT NULL DEFAULT 0,
+    ADD COLUMN `num_timeouts` INT NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS `engine_shard` (
+    `name` VARCHAR(255) PRIMARY KEY,
+    `host` VARCHAR(255) NOT NULL,
+    `teams` VARCHAR(1023) NOT NULL,
+    `check_round` INT,
+    `heartbeat` TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+
+ALTER TABLE `result`
+    ADD UNIQUE KEY `result_round` (`check_round`, `check_id`, `team_id`);
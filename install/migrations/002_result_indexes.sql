@@ -0,0 +1,11 @@
+-- Indexes for the result log, SLA and report queries
+ALTER TABLE `result`
+    ADD KEY `result_team_check` (`team_id`, `check_id`, `id`),
+    ADD KEY `result_team_time` (`team_id`, `time`),
+    ADD KEY `result_time` (`time`);
+
+ALTER TABLE `default_creds_log`
+    ADD KEY `default_creds_log_team_time` (`team_id`, `time`);
+
+ALTER TABLE `revert_log`
+    ADD KEY `revert_log_team_time` (`team_id`, `time`);
@@ -0,0 +1,20 @@
+-- Latest result for each team and check, maintained by the engine
+CREATE TABLE IF NOT EXISTS `latest_result` (
+    `team_id` INT NOT NULL,
+    `check_id` INT NOT NULL,
+    `check_round` INT NOT NULL,
+    `time` TIMESTAMP NOT NULL,
+    `result` BOOL NOT NULL,
+    PRIMARY KEY (`team_id`, `check_id`),
+    FOREIGN KEY (`team_id`) REFERENCES `team`(`id`)
+       ON DELETE CASCADE,
+    FOREIGN KEY (`check_id`) REFERENCES `service_check`(`id`)
+       ON DELETE CASCADE);
+
+-- Fill it from the results already recorded
+REPLACE INTO `latest_result` (`team_id`, `check_id`, `check_round`, `time`, `result`)
+    SELECT r.`team_id`, r.`check_id`, r.`check_round`, r.`time`, r.`result`
+    FROM `result` r
+    JOIN (SELECT `team_id`, `check_id`, MAX(`check_round`) AS `check_round`
+          FROM `result` GROUP BY `team_id`, `check_id`) m
+    USING (`team_id`, `check_id`, `check_round`);
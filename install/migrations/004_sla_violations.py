@@ -0,0 +1,47 @@
+"""
+Create the SLA tables and fill them by replaying the results already
+recorded through the SLA tracker.
+"""
+from engine.sla import SlaTracker
+from model import Model
+import db
+
+# Number of rounds of results replayed at once
+ROUNDS_PER_PAGE = 100
+
+def migrate():
+    db.execute('CREATE TABLE IF NOT EXISTS `sla_state` ('
+               '`team_id` INT NOT NULL, '
+               '`check_id` INT NOT NULL, '
+               '`check_round` INT NOT NULL, '
+               '`down_count` INT NOT NULL, '
+               'PRIMARY KEY (`team_id`, `check_id`), '
+               'FOREIGN KEY (`team_id`) REFERENCES `team`(`id`) ON DELETE CASCADE, '
+               'FOREIGN KEY (`check_id`) REFERENCES `service_check`(`id`) ON DELETE CASCADE)')
+    db.execute('CREATE TABLE IF NOT EXISTS `sla_violation` ('
+               '`id` INT NOT NULL AUTO_INCREMENT PRIMARY KEY, '
+               '`team_id` INT NOT NULL, '
+               '`check_id` INT NOT NULL, '
+               '`check_round` INT NOT NULL, '
+               '`time` TIMESTAMP NOT NULL, '
+               'UNIQUE KEY `sla_violation_round` (`team_id`, `check_id`, `check_round`), '
+               'KEY `sla_violation_team_time` (`team_id`, `time`), '
+               'FOREIGN KEY (`team_id`) REFERENCES `team`(`id`) ON DELETE CASCADE, '
+               'FOREIGN KEY (`check_id`) REFERENCES `service_check`(`id`) ON DELETE CASCADE)')
+
+    model = Model()
+    model.load_settings()
+    sla = SlaTracker(model.settings['sla_threshold'])
+    sla.load()
+
+    last_round = db.get('result', ['MAX(check_round)'])[0][0] or 0
+    # The tracker only reads the IDs, round, time and outcome of each row
+    columns = ['check_id', '0', 'team_id', 'check_round', 'time', "''", "''",
+               'result']
+    for first in range(1, last_round + 1, ROUNDS_PER_PAGE):
+        rows = db.get('result', columns,
+                      where='check_round >= %s AND check_round < %s',
+                      args=(first, first + ROUNDS_PER_PAGE))
+        runs, violations = sla.evaluate(rows)
+        db.execute_batches(sla.commands(runs, violations))
+        sla.commit(runs)
@@ -0,0 +1,21 @@
+"""
+Create the round_bitmap table and build the bitmap of every finished round.
+"""
+from engine.round_bitmap import RoundBitmap
+import db
+
+def migrate():
+    db.execute('CREATE TABLE IF NOT EXISTS `round_bitmap` ('
+               '`check_round` INT NOT NULL PRIMARY KEY, '
+               '`time` TIMESTAMP NOT NULL, '
+               '`team_ids` TEXT NOT NULL, '
+               '`check_ids` TEXT NOT NULL, '
+               '`passed` BLOB NOT NULL, '
+               '`up_prefix` MEDIUMBLOB NOT NULL, '
+               '`count_prefix` MEDIUMBLOB NOT NULL, '
+               'KEY `round_bitmap_time` (`time`), '
+               'FOREIGN KEY (`check_round`) REFERENCES `check_log`(`check_round`) ON DELETE CASCADE)')
+
+    rounds = db.get('check_log', ['check_round'], orderby='check_round ASC')
+    for check_round, in rounds:
+        RoundBitmap.build(check_round)
@@ -0,0 +1,47 @@
+"""
+Rewrite the poll input of every result in its compact form, keeping only the
+IDs of the team and credentials. The rest of the input is rebuilt from the
+result's input-output pair when it is read.
+"""
+import db
+import json
+
+# Number of results rewritten at once
+BATCH_SIZE = 5000
+
+def compact(poll_input):
+    """
+    Convert a full serialized poll input to its compact form.
+
+    Arguments:
+        poll_input (str): The serialized poll input
+
+    Returns:
+        str: The compact poll input, or None if it is already compact
+    """
+    poll_input = json.loads(poll_input)
+    if isinstance(poll_input, dict):
+        return None
+    input_class_str, args = poll_input
+    compact = {'team': args['team']}
+    if args.get('credentials') is not None:
+        compact['credentials'] = args['credentials']
+    return json.dumps(compact)
+
+def migrate():
+    last_id = 0
+    while True:
+        rows = db.get('result', ['id', 'poll_input'], where='id > %s',
+                      orderby='id ASC', args=(last_id,), limit=BATCH_SIZE)
+        if len(rows) == 0:
+            break
+        updates = []
+        for result_id, poll_input in rows:
+            poll_input = compact(poll_input)
+            if poll_input is not None:
+                updates.append((poll_input, result_id))
+        db.executemany('UPDATE result SET poll_input=%s WHERE id=%s', updates)
+        last_id = rows[-1][0]
+
+    # Give the space freed by the shorter rows back to the filesystem
+    db.execute('OPTIMIZE TABLE result')
@@ -0,0 +1,10 @@
+-- Poll latency, kept when old results are compacted
+ALTER TABLE `result`
+    ADD COLUMN `latency` FLOAT NULL;
+
+-- Compressed payloads of compacted results
+CREATE TABLE IF NOT EXISTS `result_archive` (
+    `result_id` INT NOT NULL PRIMARY KEY,
+    `payload` BLOB NOT NULL,
+    FOREIGN KEY (`result_id`) REFERENCES `result`(`id`)
+       ON DELETE CASCADE);
@@ -0,0 +1,3 @@
+-- Per-check overrides of the artifact retention policy, as JSON
+ALTER TABLE `service_check`
+    ADD COLUMN `artifacts` VARCHAR(255) NULL;
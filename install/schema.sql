@@ -47,6 +47,7 @@ CREATE TABLE `service_check` (
     `port` INT NOT NULL,
     `check_function` VARCHAR(255) NOT NULL,
     `poller` VARCHAR(255) NOT NULL,
+    `artifacts` VARCHAR(255) NULL,
     FOREIGN KEY (`system`) REFERENCES `system`(`system`)
         ON DELETE CASCADE);
 
@@ -92,7 +93,18 @@ CREATE TABLE `cred_input` (
 DROP TABLE IF EXISTS `check_log`;
 CREATE TABLE `check_log` (
     `check_round` INT PRIMARY KEY AUTO_INCREMENT,
-    `time` TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    `time` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    `end_time` TIMESTAMP NULL,
+    `num_polls` INT NOT NULL DEFAULT 0,
+    `num_timeouts` INT NOT NULL DEFAULT 0);
+
+DROP TABLE IF EXISTS `engine_shard`;
+CREATE TABLE `engine_shard` (
+    `name` VARCHAR(255) PRIMARY KEY,
+    `host` VARCHAR(255) NOT NULL,
+    `teams` VARCHAR(1023) NOT NULL,
+    `check_round` INT,
+    `heartbeat` TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
 
 DROP TABLE IF EXISTS `result`;
 CREATE TABLE `result` (
@@ -105,6 +117,11 @@ CREATE TABLE `result` (
     `poll_input` VARCHAR(4095) NOT NULL,
     `poll_result` VARCHAR(4095) NOT NULL,
     `result` BOOL NOT NULL,
+    `latency` FLOAT NULL,
+    UNIQUE KEY `result_round` (`check_round`, `check_id`, `team_id`),
+    KEY `result_team_check` (`team_id`, `check_id`, `id`),
+    KEY `result_team_time` (`team_id`, `time`),
+    KEY `result_time` (`time`),
     FOREIGN KEY (`check_id`) REFERENCES `service_check`(`id`)
        ON DELETE CASCADE,
     FOREIGN KEY (`check_io_id`) REFERENCES `check_io`(`id`)
@@ -114,6 +131,65 @@ CREATE TABLE `result` (
     FOREIGN KEY (`check_round`) REFERENCES `check_log`(`check_round`)
        ON DELETE CASCADE);
 
+DROP TABLE IF EXISTS `result_archive`;
+CREATE TABLE `result_archive` (
+    `result_id` INT NOT NULL PRIMARY KEY,
+    `payload` BLOB NOT NULL,
+    FOREIGN KEY (`result_id`) REFERENCES `result`(`id`)
+       ON DELETE CASCADE);
+
+DROP TABLE IF EXISTS `latest_result`;
+CREATE TABLE `latest_result` (
+    `team_id` INT NOT NULL,
+    `check_id` INT NOT NULL,
+    `check_round` INT NOT NULL,
+    `time` TIMESTAMP NOT NULL,
+    `result` BOOL NOT NULL,
+    PRIMARY KEY (`team_id`, `check_id`),
+    FOREIGN KEY (`team_id`) REFERENCES `team`(`id`)
+       ON DELETE CASCADE,
+    FOREIGN KEY (`check_id`) REFERENCES `service_check`(`id`)
+       ON DELETE CASCADE);
+
+DROP TABLE IF EXISTS `sla_state`;
+CREATE TABLE `sla_state` (
+    `team_id` INT NOT NULL,
+    `check_id` INT NOT NULL,
+    `check_round` INT NOT NULL,
+    `down_count` INT NOT NULL,
+    PRIMARY KEY (`team_id`, `check_id`),
+    FOREIGN KEY (`team_id`) REFERENCES `team`(`id`)
+       ON DELETE CASCADE,
+    FOREIGN KEY (`check_id`) REFERENCES `service_check`(`id`)
+       ON DELETE CASCADE);
+
+DROP TABLE IF EXISTS `sla_violation`;
+CREATE TABLE `sla_violation` (
+    `id` INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `team_id` INT NOT NULL,
+    `check_id` INT NOT NULL,
+    `check_round` INT NOT NULL,
+    `time` TIMESTAMP NOT NULL,
+    UNIQUE KEY `sla_violation_round` (`team_id`, `check_id`, `check_round`),
+    KEY `sla_violation_team_time` (`team_id`, `time`),
+    FOREIGN KEY (`team_id`) REFERENCES `team`(`id`)
+       ON DELETE CASCADE,
+    FOREIGN KEY (`check_id`) REFERENCES `service_check`(`id`)
+       ON DELETE CASCADE);
+
+DROP TABLE IF EXISTS `round_bitmap`;
+CREATE TABLE `round_bitmap` (
+    `check_round` INT NOT NULL PRIMARY KEY,
+    `time` TIMESTAMP NOT NULL,
+    `team_ids` TEXT NOT NULL,
+    `check_ids` TEXT NOT NULL,
+    `passed` BLOB NOT NULL,
+    `up_prefix` MEDIUMBLOB NOT NULL,
+    `count_prefix` MEDIUMBLOB NOT NULL,
+    KEY `round_bitmap_time` (`time`),
+    FOREIGN KEY (`check_round`) REFERENCES `check_log`(`check_round`)
+       ON DELETE CASCADE);
+
 DROP TABLE IF EXISTS `pcr`;
 CREATE TABLE `pcr` (
     `id` INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
@@ -136,6 +212,7 @@ CREATE TABLE `default_creds_log` (
     `time` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     `team_id` INT NOT NULL,
     `perc_default` DOUBLE NOT NULL,
+    KEY `default_creds_log_team_time` (`team_id`, `time`),
     FOREIGN KEY (`team_id`) REFERENCES `team`(`id`)
         ON DELETE CASCADE);
 
@@ -144,7 +221,25 @@ CREATE TABLE `revert_log` (
     `time` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     `team_id` INT NOT NULL,
     `system` VARCHAR(255),
+    KEY `revert_log_team_time` (`team_id`, `time`),
     FOREIGN KEY (`team_id`) REFERENCES `team`(`id`)
         ON DELETE CASCADE);
 
+DROP TABLE IF EXISTS `schema_version`;
+CREATE TABLE `schema_version` (
+    `version` INT PRIMARY KEY,
+    `name` VARCHAR(255) NOT NULL,
+    `applied` TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+
+-- Migrations already included in this schema
+INSERT INTO `schema_version` (`version`, `name`) VALUES
+    (1, '001_engine_rounds.sql'),
+    (2, '002_result_indexes.sql'),
+    (3, '003_latest_result.sql'),
+    (4, '004_sla_violations.py'),
+    (5, '005_round_bitmaps.py'),
+    (6, '006_compact_poll_inputs.py'),
+    (7, '007_result_retention.sql'),
+    (8, '008_check_artifacts.sql');
+
 SET foreign_key_checks = 1;
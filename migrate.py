@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""
+Apply schema migrations to an existing scoring database without resetting it.
+
+Migrations live in install/migrations and are named NNN_description.sql or
+NNN_description.py, where NNN is the schema version they upgrade to. SQL
+migrations are run statement by statement. Python migrations must define a
+migrate() function. Applied versions are recorded in the schema_version
+table. A fresh database created from install/schema.sql already includes
+every migration.
+"""
+import importlib.util
+import os
+import sys
+import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'install', 'migrations')
+
+def ensure_version_table():
+    """
+    Create the schema_version table if the database predates it.
+    """
+    db.execute('CREATE TABLE IF NOT EXISTS `schema_version` ('
+               '`version` INT PRIMARY KEY, '
+               '`name` VARCHAR(255) NOT NULL, '
+               '`applied` TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+
+def get_migrations():
+    """
+    Find all of the migrations.
+
+    Returns:
+        List(int, str): The version and file name of each migration, in order
+    """
+    migrations = []
+    for name in os.listdir(MIGRATIONS_DIR):
+        version, ext = name.split('_')[0], os.path.splitext(name)[1]
+        if version.isdigit() and ext in ['.sql', '.py']:
+            migrations.append((int(version), name))
+    migrations.sort()
+    return migrations
+
+def get_applied():
+    """
+    Get the versions of the migrations already applied to the database.
+
+    Returns:
+        Set(int): The applied versions
+    """
+    rows = db.get('schema_version', ['version'])
+    return set([version for version, in rows])
+
+def split_statements(sql):
+    """
+    Split a SQL script into statements, dropping comment lines.
+
+    Arguments:
+        sql (str): The SQL script
+
+    Returns:
+        List(str): The statements in the script
+    """
+    lines = [line for line in sql.split('\n')
+             if not line.strip().startswith('--')]
+    statements = [stmt.strip() for stmt in '\n'.join(lines).split(';')]
+    return [stmt for stmt in statements if stmt != '']
+
+def apply_migration(name):
+    """
+    Apply a single migration.
+
+    Arguments:
+        name (str): The file name of the migration
+    """
+    path = os.path.join(MIGRATIONS_DIR, name)
+    if name.endswith('.sql'):
+        with open(path, 'r') as f:
+            statements = split_statements(f.read())
+        for statement in statements:
+            db.execute(statement)
+    else:
+        spec = importlib.util.spec_from_file_location(name[:-3], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.migrate()
+
+def migrate():
+    """
+    Apply every migration which has not yet been applied, in order.
+    """
+    ensure_version_table()
+    applied = get_applied()
+    pending = [(v, name) for v, name in get_migrations() if v not in applied]
+    if len(pending) == 0:
+        print("Database is up to date.")
+        return
+    for version, name in pending:
+        print("Applying {}...".format(name))
+        apply_migration(name)
+        db.insert('schema_version', ['version', 'name'], (version, name))
+    print("Finished!")
+
+def status():
+    """
+    Print which migrations have been applied.
+    """
+    ensure_version_table()
+    applied = get_applied()
+    for version, name in get_migrations():
+        state = 'applied' if version in applied else 'pending'
+        print("{:<40} {}".format(name, state))
+
+if __name__ == '__main__':
+    if len(sys.argv) == 1 or sys.argv[1] == 'up':
+        migrate()
+    elif sys.argv[1] == 'status':
+        status()
+    else:
+        print("Usage: ./migrate.py [up|status]")
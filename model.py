@@ -19,19 +19,22 @@ class Model(object):
         Load all data from the database.
         """
         self.load_settings()
-        teams = self.load_teams()
-        self.teams = list(teams.values())
+        self.teams_by_id = self.load_teams()
+        self.teams = list(self.teams_by_id.values())
         self.domains = self.load_domains()
         self.credentials = self.load_credentials(self.teams, self.domains)
+        self.credentials_by_id = {cred.id: cred for cred in self.credentials}
 
         # Load check IOs
         check_ios = self.load_check_ios(self.credentials)
         self.check_ios = list(check_ios.values())
         self.check_ios = [ci for sublist in self.check_ios for ci in sublist]
+        self.check_ios_by_id = {cio.id: cio for cio in self.check_ios}
 
         # Load checks
         checks = self.load_checks(check_ios)
         self.checks = [check[0] for check in checks]
+        self.checks_by_id = {check.id: check for check in self.checks}
 
         vapps = self.load_vapps()
         self.vapps = [vapp for vapp in vapps.values()]
@@ -55,6 +58,30 @@ class Model(object):
         settings['timeout'] = int(settings['polling_timeout'])
         settings['running'] = int(settings['running'])
         settings['revert_penalty'] = int(settings['revert_penalty'])
+        settings['concurrency'] = int(settings.get('polling_concurrency', 256))
+        settings['workers'] = int(settings.get('polling_workers', 128))
+        settings['overlap'] = settings.get('polling_overlap', 'delay')
+        settings['dispatch'] = settings.get('polling_dispatch', 'burst')
+        settings['spread'] = float(settings.get('polling_spread', 0.5))
+        settings['batch_size'] = int(settings.get('results_batch_size', 500))
+        settings['flush_interval'] = int(settings.get('results_flush_interval', 1000)) / 1000
+        settings['max_pending'] = int(settings.get('results_max_pending', 10000))
+        settings['spool'] = settings.get('results_spool', 'etc/results.spool')
+        settings['latency_threshold'] = int(settings.get('results_latency_threshold', 5000)) / 1000
+        settings['retry_interval'] = int(settings.get('results_retry_interval', 10))
+        settings['poll_input_storage'] = settings.get('results_poll_input_storage', 'compact')
+        settings['sla_threshold'] = int(settings.get('sla_threshold', 6))
+        settings['retention_enabled'] = int(settings.get('retention_enabled', 0))
+        settings['retention_keep_successes'] = int(settings.get('retention_keep_successes', 20))
+        settings['retention_archive'] = int(settings.get('retention_archive', 0))
+        settings['retention_interval'] = int(settings.get('retention_interval', 300))
+        settings['retention_batch_size'] = int(settings.get('retention_batch_size', 1000))
+        settings['artifacts_memory_limit'] = int(settings.get('artifacts_memory_limit', 64)) * 1024 * 1024
+        settings['artifacts_memory_threshold'] = int(settings.get('artifacts_memory_threshold', 1024)) * 1024
+        settings['artifacts_spool_dir'] = settings.get('artifacts_spool_dir', '/dev/shm/scoring-artifacts')
+        settings['artifacts_persist'] = settings.get('artifacts_persist', 'failures')
+        settings['artifacts_sample'] = float(settings.get('artifacts_sample', 0.0))
+        settings['artifacts_max_age'] = float(settings.get('artifacts_max_age', 0))
 
         self.settings = settings
 
@@ -91,21 +118,20 @@ class Model(object):
         Load credentials from the database.
         
         Arguments:
-            teams (Dict(int->Team)): Mapping of team IDs to Teams to associate credentials with
+            teams (List(Team)): List of teams to associate credentials with
             domains (List(Domain)): List of domains to associate credentials with
 
         Returns:
             List(Credential): List of credentials
         """
+        teams_by_id = {team.id: team for team in teams}
+        domains_by_fqdn = {domain.fqdn: domain for domain in domains}
+
         creds = []
         cred_rows = db.getall('credential')
         for cred_id, username, password, team_id, check_id, domain_name, is_default in cred_rows:
-            team = next(filter(lambda t: t.id == team_id, teams))
-            domain_lst = list(filter(lambda d: d.fqdn == domain_name, domains))
-            if len(domain_lst) == 0:
-                domain = None
-            else:
-                domain = domain_lst[0]
+            team = teams_by_id[team_id]
+            domain = domains_by_fqdn.get(domain_name)
 
             cred = Credential(cred_id, username, password, team, domain, is_default)
             creds.append(cred)
@@ -125,30 +151,30 @@ class Model(object):
             Dict(int->List(CheckIO)): Mapping of check IDs to a list of CheckIOs
         """
         check_ios = {}
+        credentials_by_id = {cred.id: cred for cred in credentials}
    
-        # Gather all of the check IOs
-        check_io_rows = db.getall('check_io')
-        for check_io_id, poll_input, expected, check_id in check_io_rows:
-            # Gather all of the credentials which belong to this check IO
-            cred_input_rows = db.get('cred_input', ['*'],
-                                     where='check_io_id=%s', args=(check_io_id))
-            check_creds = []
-            for cred_input_id, cred_id, _check_io_id in cred_input_rows:
-                cred = next(filter(lambda c: c.id == cred_id, credentials))
-                check_creds.append(cred)
-
-            # Build check IO
-            expected = json.loads(expected)
-            check_io = CheckIO(check_io_id, poll_input, 
-                               expected, check_creds)
-
-            # Update link from credential to this check IO
-            for cred in check_creds:
+        # Gather all of the check IOs along with the IDs of their credentials
+        table = 'check_io LEFT JOIN cred_input ON cred_input.check_io_id=check_io.id'
+        columns = ['check_io.id', 'check_io.input', 'check_io.expected',
+                   'check_io.check_id', 'cred_input.cred_id']
+        rows = db.get(table, columns, orderby='check_io.id, cred_input.id')
+
+        check_io = None
+        for check_io_id, poll_input, expected, check_id, cred_id in rows:
+            if check_io is None or check_io.id != check_io_id:
+                # Build check IO
+                expected = json.loads(expected)
+                check_io = CheckIO(check_io_id, poll_input, expected, [])
+
+                if check_id not in check_ios:
+                    check_ios[check_id] = []
+                check_ios[check_id].append(check_io)
+
+            if cred_id is not None:
+                # Link the check IO and this credential
+                cred = credentials_by_id[cred_id]
+                check_io.credentials.append(cred)
                 cred.check_io = check_io
-
-            if check_id not in check_ios:
-                check_ios[check_id] = []
-            check_ios[check_id].append(check_io)
         return check_ios
 
     def load_checks(self, check_ios):
@@ -163,14 +189,16 @@ class Model(object):
         """
         checks = []
         check_rows = db.getall('service_check')
-        for check_id, name, system, port, check_string, poller_string in check_rows:
+        for check_id, name, system, port, check_string, poller_string, artifacts in check_rows:
             # Build check
             ios = check_ios[check_id]
             check_function = load_module(check_string)
             poller_class = load_module(poller_string)
             poller = poller_class()
+            if artifacts is not None:
+                artifacts = json.loads(artifacts)
             check = Check(check_id, name, port, check_function,
-                          ios, poller)
+                          ios, poller, artifacts)
 
             # Update link from check IOs to this check
             for check_io in ios:
@@ -190,13 +218,16 @@ class Model(object):
         Returns:
             List(System): A list of systems
         """
+        system_checks = {}
+        for check, sid in checks:
+            if sid not in system_checks:
+                system_checks[sid] = []
+            system_checks[sid].append(check)
+
         systems = []
         system_rows = db.getall('system')
         for system_name, vapp_name, host in system_rows:
-            schecks = []
-            for check, sid in checks:
-                if sid == system_name:
-                    schecks.append(check)
+            schecks = system_checks.get(system_name, [])
 
             vapp = vapps[vapp_name]
             system = System(system_name, vapp, host, schecks)
@@ -225,9 +256,7 @@ class Model(object):
         Reload the credentials from the database, modifying the Credential
         objects already in use.
         """
-        creds_list = self.load_credentials(self.teams, self.domains)
-        creds_map = {}
-        for c in creds_list:
-            creds_map[c.id] = c
-        for c in self.credentials:
-            c.password = creds_map[c.id].password
+        cred_rows = db.get('credential', ['id', 'password'])
+        for cred_id, password in cred_rows:
+            if cred_id in self.credentials_by_id:
+                self.credentials_by_id[cred_id].password = password
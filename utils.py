@@ -1,5 +1,7 @@
 import importlib
+from functools import lru_cache
 
+@lru_cache(maxsize=None)
 def load_module(module_str):
     """
     Get the module specified by the given string.
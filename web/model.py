@@ -1,5 +1,6 @@
 import db
 from flask_login import UserMixin
+from engine.model import Result
 from enum import IntEnum
 import datetime
 import json
@@ -31,3 +32,80 @@ class User(UserMixin):
             str: A unicode identifier for the user
         """
         return self.id
+
+
+class LatestResult(object):
+    """
+    The latest result of a check for a team.
+
+    Attributes:
+        team_id (int): The ID of the team
+        check_id (int): The ID of the check
+        check_round (int): The round the result was recorded in
+        time (datetime): When the result was recorded
+        result (bool): Whether the check passed
+    """
+    def __init__(self, team_id, check_id, check_round, time, result):
+        self.team_id = team_id
+        self.check_id = check_id
+        self.check_round = check_round
+        self.time = time
+        self.result = result
+
+
+class StoredResult(Result):
+    """
+    A Result loaded from the database by the web interface.
+
+    The poll input and poll result are kept in their serialized form until
+    they are first accessed, since most pages only need the outcome. If
+    they were not loaded with the result, they are fetched from the
+    database on first access.
+
+    Attributes:
+        model (WebModel): The model used to deserialize the poll input and result
+    """
+    def __init__(self, model, id, check, check_io, team, check_round,
+                 time, poll_input, poll_result, result, latency=None):
+        self.model = model
+        self.loaded_input = False
+        self.loaded_result = False
+        super().__init__(id, check, check_io, team, check_round, time,
+                         poll_input, poll_result, result, latency)
+
+    def load_details(self):
+        """
+        Fetch the serialized poll input and poll result from the database.
+        """
+        poll_input, poll_result = self.model.load_result_details(self.id)
+        if not self.loaded_input:
+            self._poll_input = poll_input
+        if not self.loaded_result:
+            self._poll_result = poll_result
+
+    @property
+    def poll_input(self):
+        if not self.loaded_input:
+            if self._poll_input is None:
+                self.load_details()
+            self._poll_input = self.model.deserialize_poll_input(self._poll_input,
+                                                                self.check_io)
+            self.loaded_input = True
+        return self._poll_input
+
+    @poll_input.setter
+    def poll_input(self, poll_input):
+        self._poll_input = poll_input
+
+    @property
+    def poll_result(self):
+        if not self.loaded_result:
+            if self._poll_result is None:
+                self.load_details()
+            self._poll_result = self.model.deserialize_poll_result(self._poll_result)
+            self.loaded_result = True
+        return self._poll_result
+
+    @poll_result.setter
+    def poll_result(self, poll_result):
+        self._poll_result = poll_result
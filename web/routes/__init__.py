@@ -2,7 +2,7 @@ from web.web_model import WebModel
 wm = WebModel()
 wm.load_db()
 
-from . import auth, reports, status, sla, pcr, systems
+from . import auth, reports, status, sla, pcr, systems, api
 blueprints = [
     auth.blueprint,
     reports.blueprint,
@@ -10,4 +10,5 @@ blueprints = [
     sla.blueprint,
     pcr.blueprint,
     systems.blueprint,
+    api.blueprint,
 ]
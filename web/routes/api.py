@@ -0,0 +1,176 @@
+from flask import Blueprint, Response, request
+from flask_login import current_user, login_required
+from engine.round_bitmap import RoundBitmap
+from threading import Lock
+import db
+import json
+import time
+from . import wm
+
+blueprint = Blueprint('api', __name__, url_prefix='/api')
+
+# Seconds between checks for a newly completed round
+ROUND_CHECK_INTERVAL = 1
+
+class ResponseCache(object):
+    """
+    Caches the bodies of API responses until a new check round completes.
+
+    Every response is tagged with the latest completed check round, which
+    is looked up at most once per ROUND_CHECK_INTERVAL. Until that round
+    changes, cached bodies are served as is, and clients which already
+    have them get 304 Not Modified without a body being built at all.
+    Bodies are built as of that round, so results of a round still in
+    progress never appear under its tag.
+
+    Attributes:
+        check_round (int): The latest completed check round
+        checked (float): When the latest completed round was last looked up
+        bodies (Dict(str->bytes)): Cached response bodies for check_round
+    """
+    def __init__(self):
+        self.check_round = None
+        self.checked = 0
+        self.bodies = {}
+        self.lock = Lock()
+
+    def latest_round(self):
+        """
+        Get the latest completed check round, clearing the cache when it
+        changes.
+
+        Returns:
+            int: The latest completed check round
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now - self.checked >= ROUND_CHECK_INTERVAL:
+                rows = db.get('check_log', ['MAX(check_round)'],
+                              where='end_time IS NOT NULL')
+                check_round = rows[0][0] or 0
+                if check_round != self.check_round:
+                    self.check_round = check_round
+                    self.bodies = {}
+                self.checked = now
+            return self.check_round
+
+    def respond(self, name, build):
+        """
+        Respond with a cached JSON body, building it if necessary.
+
+        Arguments:
+            name (str): Name of the response, unique to its contents
+            build ((int) -> object): Function which builds the response
+                data as of the given completed check round
+
+        Returns:
+            Response: The response
+        """
+        check_round = self.latest_round()
+        etag = '{}-{}'.format(name, check_round)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            with self.lock:
+                body = self.bodies.get(name)
+            if body is None:
+                body = json.dumps(build(check_round), default=str).encode('utf-8')
+                with self.lock:
+                    if self.check_round == check_round:
+                        self.bodies[name] = body
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+cache = ResponseCache()
+
+def get_latest(check_round):
+    """
+    Gather the latest result of each check for each team as of a completed
+    round.
+
+    Arguments:
+        check_round (int): The latest completed check round
+
+    Returns:
+        Dict(int->Dict(int->Dict)): Mapping of team IDs to check IDs to the
+            outcome, time and round of the latest result
+    """
+    latest = {}
+    for team_id, team_results in wm.latest_results(check_round).items():
+        latest[team_id] = {}
+        for check_id, result in team_results.items():
+            latest[team_id][check_id] = {
+                'result': bool(result.result),
+                'time': result.time.strftime('%Y-%m-%d %H:%M:%S'),
+                'check_round': result.check_round,
+            }
+    return latest
+
+def get_status(check_round):
+    """
+    Gather the data shown on the status page as of a completed round.
+
+    Arguments:
+        check_round (int): The latest completed check round
+
+    Returns:
+        Dict: The teams, checks, latest results and latest completed round
+    """
+    return {
+        'check_round': check_round,
+        'teams': {team.id: team.name for team in wm.teams},
+        'checks': {check.id: check.name for check in wm.checks},
+        'results': get_latest(check_round),
+    }
+
+def get_uptime(team_ids):
+    """
+    Compute the uptime of each check for the given teams over the whole
+    competition.
+
+    Arguments:
+        team_ids (List(int)): The teams to compute uptime for
+
+    Returns:
+        Dict(int->Dict): Mapping of team IDs to their total uptime and the
+            uptime of each check
+    """
+    bitmap_uptime = RoundBitmap.uptime()
+    uptime = {}
+    for team_id in team_ids:
+        checks = bitmap_uptime.get(team_id, {})
+        polled = [u for u in checks.values() if u is not None]
+        total = sum(polled) / len(polled) if len(polled) > 0 else None
+        uptime[team_id] = {'total': total, 'checks': checks}
+    return uptime
+
+@blueprint.route('/status', methods=['GET'])
+def status():
+    """
+    Get the teams, checks and latest results as JSON.
+    """
+    return cache.respond('status', get_status)
+
+@blueprint.route('/latest', methods=['GET'])
+def latest():
+    """
+    Get the latest result of each check for each team as JSON.
+    """
+    return cache.respond('latest', get_latest)
+
+@blueprint.route('/uptime', methods=['GET'])
+@login_required
+def uptime():
+    """
+    Get the uptime of each check as JSON. Admins get the uptime of every
+    team, and other users only that of their own team.
+    """
+    if current_user.is_admin:
+        team_ids = [team.id for team in wm.teams]
+        name = 'uptime'
+    else:
+        team_ids = [current_user.team.id]
+        name = 'uptime-{}'.format(current_user.team.id)
+    return cache.respond(name, lambda check_round: get_uptime(team_ids))
@@ -1,8 +1,9 @@
-from flask import render_template, request, Blueprint
+from flask import render_template, request, Blueprint, jsonify
 import datetime
 from flask_login import current_user, login_required
 from .decorators import admin_required
 import db
+from engine.round_bitmap import RoundBitmap
 from . import wm
 
 def init(web_model, app):
@@ -17,12 +18,14 @@ def init(web_model, app):
 
 blueprint = Blueprint('reporting', __name__, url_prefix='/reporting')
 
-@blueprint.route('/score', methods=['GET'])
-@login_required
-@admin_required
-def score():
+def get_time_range():
     """
-    Score information page
+    Get the start and end times given by GET parameters as HH:MM times of
+    the current day.
+
+    Returns:
+        datetime: The start time, or None if not given
+        datetime: The end time, or None if not given
     """
     start = request.args.get('start')
     end = request.args.get('end')
@@ -37,17 +40,16 @@ def score():
     if not end is None:
         end = datetime.datetime.strptime(end, '%H:%M')
         end = end.replace(year=today.year, month=today.month, day=today.day)
+    return start, end
 
-    wm.load_results()
-    results = wm.results
-    simple_results = {}
-    for team,tresults in results.items():
-        simple_results[team] = {}
-        for check,cresults in tresults.items():
-            simple_results[team][check] = []
-            for res in cresults:
-                if (start is None or res.time >= start) and (end is None or res.time <= end):
-                    simple_results[team][check].append([res.time.strftime('%Y-%m-%d %H:%M:%S'), res.result])
+@blueprint.route('/score', methods=['GET'])
+@login_required
+@admin_required
+def score():
+    """
+    Score information page
+    """
+    start, end = get_time_range()
 
     teams = {}
     for team in wm.teams:
@@ -56,10 +58,41 @@ def score():
     for check in wm.checks:
         checks[check.id] = check.name
 
+    uptime = {}
+    bitmap_uptime = RoundBitmap.uptime(start, end)
+    for team_id in teams.keys():
+        uptime[team_id] = {}
+        team_uptime = bitmap_uptime.get(team_id, {})
+        for check_id in checks.keys():
+            uptime[team_id][check_id] = team_uptime.get(check_id)
+        polled = [u for u in uptime[team_id].values() if u is not None]
+        if len(polled) > 0:
+            uptime[team_id]['total'] = sum(polled) / len(polled)
+        else:
+            uptime[team_id]['total'] = None
+
     systems = wm.systems
     reverts = wm.get_reverts()
 
-    return render_template('reports/score.html', results=simple_results, teams=teams, checks=checks, systems=systems, reverts=reverts)
+    return render_template('reports/score.html', teams=teams, checks=checks, uptime=uptime, systems=systems, reverts=reverts)
+
+@blueprint.route('/score/trend', methods=['GET'])
+@login_required
+@admin_required
+def score_trend():
+    """
+    Get the score trend of each team and check as JSON, bucketed into
+    windows of the number of seconds given by the bucket GET parameter and
+    downsampled to at most the number of points given by the points GET
+    parameter.
+    """
+    start, end = get_time_range()
+    bucket = request.args.get('bucket', type=int)
+    points = request.args.get('points', 500, type=int)
+    if bucket is not None and bucket <= 0:
+        bucket = None
+    trends = wm.get_score_trend(start, end, bucket, points)
+    return jsonify(trends)
 
 @blueprint.route('/default', methods=['GET'])
 @login_required
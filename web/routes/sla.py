@@ -1,36 +1,38 @@
 from flask import render_template, Blueprint
-from flask_login import login_required
+from flask_login import current_user, login_required
 import db
 from . import wm
 
 blueprint = Blueprint('sla', __name__, '/sla')
 
-def get_team_slas(team_id):
-    results = db.get('result', ['time', 'check_id', 'result'], where='team_id=%s', orderby='time ASC', args=(team_id,))
-    down_counts = {}
-    slas = []
-    for time, check_id, result in results:
-        if not check_id in down_counts:
-            down_counts[check_id] = 0
-        if not result:
-            down_counts[check_id] += 1
-        else:
-            down_counts[check_id] = 0
-        if down_counts[check_id] >= 6:
-            down_counts[check_id] = 0
-            slas.append((time, check_id))
-    return slas
+def get_slas(team_id=None):
+    """
+    Get the SLA violations recorded by the engine.
+
+    Arguments:
+        team_id (int): Optional, only get the violations of this team
 
-def get_slas():
+    Returns:
+        Dict(int->List(Tuple(datetime, int))): Mapping of team IDs to the time and check ID of each violation
+    """
     slas = {}
     for team in wm.teams:
-        slas[team.id] = get_team_slas(team.id)
+        slas[team.id] = []
+    if team_id is None:
+        rows = db.get('sla_violation', ['team_id', 'time', 'check_id'],
+                      orderby='time ASC')
+    else:
+        rows = db.get('sla_violation', ['team_id', 'time', 'check_id'],
+                      where='team_id=%s', orderby='time ASC', args=(team_id,))
+    for team_id, time, check_id in rows:
+        if team_id in slas:
+            slas[team_id].append((time, check_id))
     return slas
 
 @blueprint.route('/log', methods=['GET'])
 @login_required
 def sla_log():
-    slas = get_slas()
+    slas = get_slas(current_user.team.id)
 
     cs = {}
     for check in wm.checks:
@@ -1,4 +1,4 @@
-from flask import render_template, request, Blueprint
+from flask import render_template, request, Blueprint, abort
 from flask_login import login_required
 from .decorators import admin_required
 from . import wm
@@ -45,14 +45,27 @@ def credentials():
 @admin_required
 def result_log():
     """
-    Render the log of all of the checks for the team and check given by GET parameters.
+    Render a page of the log of the checks for the team and check given by
+    GET parameters. Pages are selected by the ID of the oldest result on
+    the previous page.
     """
-    wm.reload_credentials()
-    wm.load_results()
-
     team_id = int(request.args.get('tid'))
     check_id = int(request.args.get('cid'))
-    results = sorted(wm.results[team_id][check_id], key= lambda r: r.time, reverse=True)
+    before = request.args.get('before', type=int)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    results, next_before = wm.load_result_log(team_id, check_id, before, limit)
+    return render_template('result_log.html', results=results, team_id=team_id,
+                           check_id=check_id, limit=limit, next_before=next_before)
 
-    fname = ''
-    return render_template('result_log.html', results=results, fname=fname)
+@blueprint.route('/result_log/detail', methods=['GET'])
+@login_required
+@admin_required
+def result_detail():
+    """
+    Render the poll input and result of the result given by a GET parameter.
+    """
+    wm.reload_credentials()
+    result = wm.load_result(int(request.args.get('id')))
+    if result is None:
+        abort(404)
+    return render_template('result_detail.html', r=result)
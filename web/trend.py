@@ -0,0 +1,107 @@
+"""
+This module contains the aggregation used to draw the score trend graph.
+"""
+import numpy as np
+
+# Total score of a team with every check passing
+MAX_SCORE = 5000.0
+
+def bucket_scores(team_ids, check_ids, results, violations, penalty, bucket):
+    """
+    Total the score of each team and check in fixed-size time buckets.
+
+    Each passed check is worth an equal share of MAX_SCORE for its team,
+    and each SLA violation costs `penalty` shares.
+
+    Arguments:
+        team_ids (List(int)): The IDs of the teams
+        check_ids (List(int)): The IDs of the checks
+        results (List(Tuple(int, int, float, bool))): The team ID, check ID,
+            timestamp and outcome of each result
+        violations (List(Tuple(int, int, float))): The team ID, check ID and
+            timestamp of each SLA violation
+        penalty (float): Shares lost for each SLA violation
+        bucket (float): Width of each bucket in seconds
+
+    Returns:
+        ndarray: The start timestamp of each bucket
+        ndarray: The running score of each team and check at the end of
+            each bucket, indexed by team, check and bucket
+    """
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+    check_index = {check_id: i for i, check_id in enumerate(check_ids)}
+    shape = (len(team_ids), len(check_ids))
+    if len(results) == 0 or shape[0] * shape[1] == 0:
+        return np.zeros(0), np.zeros(shape + (0,))
+
+    res = np.array([(team_index[t], check_index[c], time, passed)
+                    for t, c, time, passed in results
+                    if t in team_index and c in check_index], dtype=float)
+    sla = np.array([(team_index[t], check_index[c], time)
+                    for t, c, time in violations
+                    if t in team_index and c in check_index],
+                   dtype=float).reshape(-1, 3)
+    if len(res) == 0:
+        return np.zeros(0), np.zeros(shape + (0,))
+
+    start = res[:, 2].min()
+    num_buckets = int((res[:, 2].max() - start) // bucket) + 1
+    times = start + np.arange(num_buckets) * bucket
+
+    # Each team's polls share its maximum score
+    cells = res[:, 0].astype(int) * shape[1] + res[:, 1].astype(int)
+    polls = np.bincount(res[:, 0].astype(int), minlength=shape[0])
+    point_value = MAX_SCORE / np.maximum(polls, 1)
+
+    scores = np.zeros((shape[0] * shape[1], num_buckets))
+    buckets = ((res[:, 2] - start) // bucket).astype(int)
+    np.add.at(scores, (cells, buckets),
+              res[:, 3] * point_value[res[:, 0].astype(int)])
+
+    if len(sla) > 0:
+        sla_cells = sla[:, 0].astype(int) * shape[1] + sla[:, 1].astype(int)
+        sla_buckets = np.clip((sla[:, 2] - start) // bucket, 0,
+                              num_buckets - 1).astype(int)
+        np.add.at(scores, (sla_cells, sla_buckets),
+                  -penalty * point_value[sla[:, 0].astype(int)])
+
+    scores = np.cumsum(scores, axis=1).reshape(shape + (num_buckets,))
+    return times, scores
+
+def lttb(x, y, threshold):
+    """
+    Downsample a series with the Largest-Triangle-Three-Buckets algorithm,
+    which keeps the points that contribute most to the shape of the line.
+    The first and last points are always kept.
+
+    Arguments:
+        x (ndarray): The x values, in ascending order
+        y (ndarray): The y values
+        threshold (int): The number of points to keep
+
+    Returns:
+        ndarray: The indices of the points kept
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    kept = np.zeros(threshold, dtype=int)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket, or the last point for the final bucket
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        areas = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) -
+                       (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(areas))
+        kept[i + 1] = a
+    kept[-1] = n - 1
+    return kept
@@ -1,11 +1,15 @@
 import db
 from model import Model
-from engine.model import Result
-from .model import User
+from .model import User, LatestResult, StoredResult
+from . import trend
+from engine.polling.poller import PollInput
 import utils
+import copy
 import json
 import re
 import bcrypt
+import datetime
+import zlib
 
 class WebModel(Model):
 
@@ -15,44 +19,73 @@ class WebModel(Model):
         """
         super().load_db()
         self.users = self.load_web_users(self.teams)
-        self.load_results()
 
     def load_web_users(self, teams):
         """
         Load the web application users from the database.
 
         Arguments:
-            teams (Dict(int->Team)): Mapping of team database IDs to Teams
+            teams (List(Team)): List of teams to associate users with
 
         Returns:
             Dict(str->User): Mapping of usernames to User objects for users who can login to the web application.
         """
+        teams_by_id = {team.id: team for team in teams}
         users = {}
         user_rows = db.get('users', ['username', 'team_id', 'is_admin'])
         for user,team_id,is_admin in user_rows:
-            teams_match = [t for t in teams if t.id == team_id]
-            if len(teams_match) == 0:
-                team = None
-            else:
-                team = teams_match[0]
+            team = teams_by_id.get(team_id)
             users[user] = User(user, team, is_admin)
         return users
 
-    def latest_results(self):
+    def latest_results(self, check_round=None):
         """
-        Gather the latest results for each team/check combo.
+        Gather the latest results for each team/check combo. These are
+        maintained by the engine, so the result history is only read for
+        results as of a round which has since been polled again.
+
+        Arguments:
+            check_round (int): Optional, only include results up to this
+                round, such as the latest completed round
 
         Returns:
-            Dict(int->Dict(int->(Result))): A mapping of each team and check to its latest result
+            Dict(int->Dict(int->(LatestResult))): A mapping of each team and check to its latest result
         """
-        self.load_results()
         results = {}
         for team in self.teams:
             results[team.id] = {}
-            for check in self.checks:
-                if len(self.results[team.id][check.id]) > 0:
-                    res = self.results[team.id][check.id][-1]
-                    results[team.id][check.id] = res
+        rows = db.get('latest_result', ['team_id', 'check_id', 'check_round',
+                                        'time', 'result'])
+        newer = []
+        for team_id, check_id, result_round, time, result in rows:
+            if team_id not in results:
+                continue
+            if check_round is not None and result_round > check_round:
+                newer.append((team_id, check_id))
+                continue
+            results[team_id][check_id] = LatestResult(team_id, check_id,
+                                                      result_round, time,
+                                                      result)
+        if len(newer) == 0:
+            return results
+
+        # Results of a later round replaced these, so read them back from
+        # the given round, or from the last round before it which has them
+        rows = db.get('result', ['team_id', 'check_id', 'check_round', 'time',
+                                 'result'],
+                      where='check_round=%s', args=(check_round,))
+        in_round = {(row[0], row[1]): row[2:] for row in rows}
+        for team_id, check_id in newer:
+            row = in_round.get((team_id, check_id))
+            if row is None:
+                rows = db.get('result', ['check_round', 'time', 'result'],
+                              where='team_id=%s AND check_id=%s AND check_round<=%s',
+                              orderby='id DESC', args=(team_id, check_id, check_round),
+                              limit=1)
+                if len(rows) == 0:
+                    continue
+                row = rows[0]
+            results[team_id][check_id] = LatestResult(team_id, check_id, *row)
         return results
 
     def change_passwords(self, team_id, domain_id, service_id, pwchange):
@@ -112,49 +145,231 @@ class WebModel(Model):
         """
         db.modify('settings', 'value=%s', (value, key), where='skey=%s')
 
-    def load_results(self):
+    def load_result_log(self, team_id, check_id, before=None, limit=50):
         """
-        Update results with any results not yet loaded from the database.
+        Load a page of results for a team and check, newest first. Pages are
+        found by result ID rather than offset, so each page is a single
+        index range read no matter how far back it is. The poll inputs and
+        results are not loaded until they are used.
+
+        Arguments:
+            team_id (int): The ID of the team
+            check_id (int): The ID of the check
+            before (int): Optional, only load results older than this result ID
+            limit (int): Maximum number of results to load
+
+        Returns:
+            List(StoredResult): The results, newest first
+            int: The ID to load the next page before, or None if this is the last page
         """
-        if self.results is None:
-            last_id = 0
-            # Setup dict
-            self.results = {}
-            for team in self.teams:
-                self.results[team.id] = {}
-                for check in self.checks:
-                    self.results[team.id][check.id] = []
+        where = 'team_id=%s AND check_id=%s'
+        args = [team_id, check_id]
+        if before is not None:
+            where += ' AND id < %s'
+            args.append(before)
+        rows = db.get('result', ['id', 'check_io_id', 'check_round', 'time',
+                                 'result', 'latency'],
+                      where=where, orderby='id DESC', args=args, limit=limit+1)
+
+        results = []
+        for result_id, check_io_id, check_round, time, result, latency in rows[:limit]:
+            results.append(self.make_result(result_id, check_id, check_io_id,
+                                            team_id, check_round, time, None,
+                                            None, result, latency))
+        if len(rows) > limit:
+            next_before = results[-1].id
         else:
-            # If results exist, we can just load the latest ones and keep the old ones
-            # Here we find the id of the last result we already have
-            last_ids = []
-            for team_results in self.results.values():
-                for check_results in team_results.values():
-                    if len(check_results) != 0:
-                        last_ids.append(check_results[-1].id)
-            last_id = -1
-            if len(last_ids) != 0:
-                last_id = max(last_ids)
-
-        rows = db.get('result', ['*'], where='id > %s',
-                      orderby='time ASC', args=(last_id))
-
-        # Gather the results
-        for result_id, check_id, check_io_id, team_id, check_round, time, poll_input, poll_result, result in rows:
-            # Construct the result from the database info
-            check = [c for c in self.checks if c.id == check_id][0]
-            check_io = [cio for cio in self.check_ios if cio.id == check_io_id][0]
-            team = [t for t in self.teams if t.id == team_id][0]
-
-            input_class_str, input_args = json.loads(poll_input)
-            input_class = utils.load_module(input_class_str)
-            poll_input = input_class.deserialize(input_class, input_args, self.teams, self.credentials)
-
-            poll_result = json.loads(poll_result)[1]
-
-            res = Result(result_id, check, check_io, team, check_round, time, poll_input, poll_result, result)
-
-            self.results[team_id][check_id].append(res)
+            next_before = None
+        return results, next_before
+
+    def load_result(self, result_id):
+        """
+        Load a single result. Its poll input and result are loaded when
+        they are first used.
+
+        Arguments:
+            result_id (int): The ID of the result
+
+        Returns:
+            StoredResult: The result, or None if there is no such result
+        """
+        rows = db.get('result', ['id', 'check_id', 'check_io_id', 'team_id',
+                                 'check_round', 'time', 'result', 'latency'],
+                      where='id=%s', args=(result_id,))
+        if len(rows) == 0:
+            return None
+        result_id, check_id, check_io_id, team_id, check_round, time, result, latency = rows[0]
+        return self.make_result(result_id, check_id, check_io_id, team_id,
+                                check_round, time, None, None, result, latency)
+
+    def load_result_details(self, result_id):
+        """
+        Load the serialized poll input and poll result of a result. If they
+        were removed by the retention policy, they are taken from the
+        archive when it has them, and are empty otherwise.
+
+        Arguments:
+            result_id (int): The ID of the result
+
+        Returns:
+            str: The serialized poll input
+            str: The serialized poll result
+        """
+        rows = db.get('result', ['poll_input', 'poll_result'], where='id=%s',
+                      args=(result_id,))
+        poll_input, poll_result = rows[0]
+        if poll_result == '':
+            archived = db.get('result_archive', ['payload'],
+                              where='result_id=%s', args=(result_id,))
+            if len(archived) > 0:
+                poll_input, poll_result = json.loads(zlib.decompress(archived[0][0]).decode())
+        return poll_input, poll_result
+
+    def make_result(self, result_id, check_id, check_io_id, team_id,
+                    check_round, time, poll_input, poll_result, result,
+                    latency=None):
+        """
+        Construct a result from a row of the result table.
+
+        Arguments:
+            result_id (int): The ID of the result
+            check_id (int): The ID of the check
+            check_io_id (int): The ID of the input-output pair used in the check
+            team_id (int): The ID of the team
+            check_round (int): The check round
+            time (datetime): When the result was recorded
+            poll_input (str): The serialized poll input, or None to fetch
+                it from the database when first accessed
+            poll_result (str): The serialized poll result, or None to fetch
+                it from the database when first accessed
+            result (bool): Whether the check passed
+            latency (float): Optional, seconds the poll took
+
+        Returns:
+            StoredResult: The result
+        """
+        check = self.checks_by_id[check_id]
+        check_io = self.check_ios_by_id[check_io_id]
+        team = self.teams_by_id[team_id]
+        return StoredResult(self, result_id, check, check_io, team,
+                            check_round, time, poll_input, poll_result, result,
+                            latency)
+
+    def get_score_trend(self, start=None, end=None, bucket=None, points=500):
+        """
+        Compute the running score of each team and check over time.
+
+        Arguments:
+            start (datetime): Optional, only count results at or after this time
+            end (datetime): Optional, only count results at or before this time
+            bucket (float): Optional, seconds per point before downsampling,
+                defaulting to the polling interval
+            points (int): Maximum number of points in each series
+
+        Returns:
+            Dict(int->Dict(str->List)): Mapping of team IDs to the total
+                series and the series of each check, where each series is
+                a list of (time, score) points
+        """
+        if bucket is None:
+            bucket = self.settings['interval']
+        where = []
+        args = []
+        if start is not None:
+            where.append('time >= %s')
+            args.append(start)
+        if end is not None:
+            where.append('time <= %s')
+            args.append(end)
+        where = ' AND '.join(where) if len(where) > 0 else None
+
+        # The time range is applied by the result_time index
+        results = db.get('result', ['team_id', 'check_id', 'UNIX_TIMESTAMP(time)', 'result'],
+                         where=where, args=args)
+        violations = db.get('sla_violation', ['team_id', 'check_id', 'UNIX_TIMESTAMP(time)'],
+                            where=where, args=args)
+
+        team_ids = [team.id for team in self.teams]
+        check_ids = [check.id for check in self.checks]
+        times, scores = trend.bucket_scores(team_ids, check_ids, results,
+                                            violations, len(check_ids), bucket)
+        labels = [datetime.datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S')
+                  for t in times]
+
+        def series(values):
+            return [(labels[i], float(values[i]))
+                    for i in trend.lttb(times, values, points)]
+
+        trends = {}
+        for i, team_id in enumerate(team_ids):
+            trends[team_id] = {
+                'total': series(scores[i].sum(axis=0)),
+                'checks': {},
+            }
+            for j, check_id in enumerate(check_ids):
+                trends[team_id]['checks'][check_id] = series(scores[i, j])
+        return trends
+
+    def deserialize_poll_input(self, poll_input, check_io):
+        """
+        Rebuild a PollInput stored with a result, in either its full or
+        compact form.
+
+        Arguments:
+            poll_input (str): The serialized poll input
+            check_io (CheckIO): The input-output pair used in the poll
+
+        Returns:
+            PollInput: The poll input, or None if it was removed by the
+                retention policy
+        """
+        if poll_input == '':
+            return None
+        poll_input = json.loads(poll_input)
+        if isinstance(poll_input, dict):
+            # The web model keeps the input of each input-output pair
+            # serialized, so rebuild it before filling in the poll's team
+            # and credentials
+            check_io = copy.copy(check_io)
+            check_io.poll_input = self.load_poll_input(check_io.poll_input)
+            return PollInput.deserialize_compact(check_io, poll_input,
+                                                 self.teams_by_id,
+                                                 self.credentials_by_id)
+        return self.load_poll_input(poll_input)
+
+    def load_poll_input(self, poll_input):
+        """
+        Rebuild a PollInput serialized in its full form.
+
+        Arguments:
+            poll_input (str or List): The serialized poll input, either as
+                JSON or already decoded
+
+        Returns:
+            PollInput: The poll input
+        """
+        if isinstance(poll_input, str):
+            poll_input = json.loads(poll_input)
+        input_class_str, input_args = poll_input
+        input_class = utils.load_module(input_class_str)
+        return input_class.deserialize(input_class, input_args,
+                                       self.teams_by_id,
+                                       self.credentials_by_id)
+
+    def deserialize_poll_result(self, poll_result):
+        """
+        Decode the attributes of a PollResult stored with a result.
+
+        Arguments:
+            poll_result (str): The serialized poll result
+
+        Returns:
+            Dict(str->object): The attributes of the poll result, empty if
+                it was removed by the retention policy
+        """
+        if poll_result == '':
+            return {}
+        return json.loads(poll_result)[1]
 
     def get_reverts(self):
         revert_rows = db.getall('revert_log')